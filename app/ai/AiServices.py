@@ -1,29 +1,258 @@
-from typing import List
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
-from pydantic_ai import Agent
+from fastapi import HTTPException
+from opentelemetry import trace
+from pydantic_ai import Agent, ModelRetry, PromptedOutput, RunContext
+from pydantic_ai.exceptions import ModelAPIError
+from pydantic_ai.models import Model
+from pydantic_ai.result import StreamedRunResult
+from pydantic_ai.usage import RunUsage
 
 from app.models.Request import SkinProfileRequest, AIRequest
-from app.models.Response import AnalysisResponse
+from app.models.Response import AnalysisOutput, SkinCareRoutineIds, SkinTypes
+from app.ai.CircuitBreaker import circuit_breaker
+from app.ai.FakeModel import FakeModelBackend
+from app.ai.ModelRouter import ModelRouter
+from app.ai.PartialOutput import PartialAnalysisTracker, partial_output
+from app.ai.ProfilePrompt import render_profile
+from app.ai.ProviderPool import provider_pool
+from app.ai.RetryPolicy import retry_policy
+from app.ai.Scheduler import model_scheduler
+from app.ai.UsageTracker import usage_tracker
+from app.catalog.ProductCatalog import product_catalog
+from app.config.Settings import (
+    AI_FAST_MODEL, AI_PRO_MODEL, ROUTING_ENABLED, RETRY_OUTPUT_RETRIES, CATALOG_SEARCH_LIMIT, MODEL_BACKEND,
+    FAKE_LATENCY_MEDIAN_SECONDS, FAKE_LATENCY_SIGMA, FAKE_ERROR_RATE, FAKE_ERROR_STATUS, FAKE_INVALID_OUTPUT_RATE,
+    FAKE_SEED, PROFILE_PROMPT_MAX_TOKENS, PROFILE_PROMPT_MAX_VALUE_CHARS,
+)
+from app.metrics.Metrics import observe_stage
+from app.metrics.Tracing import tracer
+
+logger = logging.getLogger('uvicorn')
 
 PROMPT = """  
 Você é um dermatologista altamente experiente, especializado em cuidados com a pele do rosto.
 Receberá perguntas, respostas e imagens de um paciente relacionadas à saúde e estética facial.
 Com base nessas informações, deve analisar cuidadosamente e responder seguindo exatamente o modelo de resposta fornecido, utilizando uma linguagem técnica, empática e profissional, adequada à prática dermatológica.
 Suas respostas devem ser claras, objetivas e baseadas em evidências clínicas, considerando aspectos como diagnóstico diferencial, possíveis causas, tratamento recomendado e orientações preventivas.
-Todos produtos devem ser buscados no site: https://www.dermage.com.br/
+Todos os produtos da rotina devem vir do catálogo da Dermage (https://www.dermage.com.br/), consultado pela ferramenta search_products; nas rotinas da manhã e da noite informe apenas os ids dos produtos escolhidos.
 """
 
+fake_backend = FakeModelBackend(
+    FAKE_LATENCY_MEDIAN_SECONDS,
+    FAKE_LATENCY_SIGMA,
+    FAKE_ERROR_RATE,
+    FAKE_ERROR_STATUS,
+    FAKE_INVALID_OUTPUT_RATE,
+    FAKE_SEED,
+) if MODEL_BACKEND == "fake" else None
+
+
+def resolve_model(name: str) -> Union[str, Model]:
+    # Os nomes continuam identificando as camadas em métricas, retentativas e uso
+    return fake_backend.model(name) if fake_backend is not None else provider_pool.model(name)
+
+
+# Sem modelo padrão: cada execução recebe o de resolve_model, já ligado ao pool de conexões do lifespan
 dermage_agent = Agent(
-    "google-gla:gemini-2.5-pro",
+    None,
+    deps_type=SkinProfileRequest,
+    output_type=AnalysisOutput,
+    system_prompt=PROMPT,
+    retries={"tools": 3, "output": RETRY_OUTPUT_RETRIES}
+)
+
+
+@dermage_agent.system_prompt
+def catalog_terms() -> str:
+    return (
+        f"Categorias do catálogo: {', '.join(product_catalog.categories)}. "
+        f"Preocupações do catálogo: {', '.join(product_catalog.concerns)}."
+    )
+
+
+@dermage_agent.system_prompt
+def skin_profile(ctx: RunContext[SkinProfileRequest]) -> str:
+    return render_profile(ctx.deps, PROFILE_PROMPT_MAX_TOKENS, PROFILE_PROMPT_MAX_VALUE_CHARS)
+
+
+@dermage_agent.output_validator
+def check_product_ids(output: AnalysisOutput) -> AnalysisOutput:
+    unknown = product_catalog.unknown_ids(output.routine.morning + output.routine.night)
+    if unknown:
+        raise ModelRetry(f"Ids inexistentes no catálogo: {', '.join(unknown)}. Use apenas ids retornados por search_products.")
+    return output
+
+
+@dermage_agent.tool_plain
+def search_products(
+        category: Optional[str] = None,
+        skin_type: Optional[SkinTypes] = None,
+        concern: Optional[str] = None,
+        max_price: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Busca produtos reais no catálogo Dermage; todos os filtros são opcionais e combinados entre si.
+
+    Args:
+        category: categoria do produto, por exemplo limpeza, serum, hidratante ou protetor solar.
+        skin_type: tipo de pele a que o produto se destina.
+        concern: preocupação tratada, por exemplo acne, manchas ou envelhecimento.
+        max_price: preço máximo em reais.
+    """
+    products = product_catalog.search(category, skin_type, concern, max_price, limit=CATALOG_SEARCH_LIMIT)
+    # Só o necessário para a escolha; descrição, imagem e link são preenchidos na hidratação
+    return [
+        product.model_dump(mode="json", include={"id", "title", "category", "price", "skin_types", "concerns"})
+        for product in products
+    ]
+
+
+# Mesmo prompt e ferramenta, mas com a saída em texto JSON para permitir o streaming. O run_stream não refaz a
+# chamada quando a validação da saída falha, então não há validador de ids: os inexistentes são descartados
+dermage_stream_agent = Agent(
+    None,
     deps_type=SkinProfileRequest,
-    output_type=AnalysisResponse,
+    output_type=PromptedOutput(AnalysisOutput),
     system_prompt=PROMPT,
-    retries=3
+    tools=[search_products],
+    retries={"tools": 3}
 )
+dermage_stream_agent.system_prompt(catalog_terms)
+dermage_stream_agent.system_prompt(skin_profile)
 
-async def analyze_skin(ai_request: AIRequest) -> AnalysisResponse:
+
+def drop_unknown_products(output: AnalysisOutput) -> AnalysisOutput:
+    unknown = set(product_catalog.unknown_ids(output.routine.morning + output.routine.night))
+    if not unknown:
+        return output
+    logger.warning(f"Ids inexistentes no catálogo descartados da rotina: {', '.join(sorted(unknown))}")
+    routine = SkinCareRoutineIds(
+        morning=[product_id for product_id in output.routine.morning if product_id not in unknown],
+        night=[product_id for product_id in output.routine.night if product_id not in unknown],
+    )
+    return output.model_copy(update={"routine": routine})
+
+
+def _record_failure(model: str, usage: RunUsage, seconds: float, error: Exception):
+    # O pydantic-ai só conta uma requisição quando ela tem resposta; a que falhou no provedor também gastou cota
+    if isinstance(error, ModelAPIError):
+        usage.requests += 1
+    usage_tracker.record(model, usage, seconds, failed=True)
+
+
+async def _run_model(ai_request: AIRequest, model: str) -> AnalysisOutput:
+    deps = ai_request.skin_profile
+
+    async def attempt() -> AnalysisOutput:
+        async with model_scheduler.slot(ai_request.priority):
+            started = time.perf_counter()
+            # Acumula também as requisições e tokens de execuções que falham no meio
+            usage = RunUsage()
+            try:
+                with observe_stage("model_call"):
+                    result = await dermage_agent.run(
+                        ai_request.images, deps=deps, model=resolve_model(model), usage=usage
+                    )
+            except Exception as e:
+                _record_failure(model, usage, time.perf_counter() - started, e)
+                raise
+            usage_tracker.record(model, usage, time.perf_counter() - started)
+            trace.get_current_span().set_attributes({
+                "gen_ai.request.model": model,
+                "gen_ai.usage.input_tokens": usage.input_tokens,
+                "gen_ai.usage.output_tokens": usage.output_tokens,
+                "model.requests": usage.requests,
+            })
+        return result.output
+
+    # O backoff acontece fora do agendador, sem ocupar uma vaga de chamada ao provedor
+    return await retry_policy.call(attempt, key=model)
+
+
+async def warm_up_agents():
+    """Executa os agentes uma vez contra um modelo local, montando esquemas, validadores e a chamada de
+    ferramenta antes da primeira requisição real."""
+    started = time.perf_counter()
+    warmup_model = FakeModelBackend(0, 0, 0, 503, 0, seed=0).model("warmup")
+    deps = SkinProfileRequest(questions=[], others=[])
+    try:
+        for agent in (dermage_agent, dermage_stream_agent):
+            await agent.run("Aquecimento", deps=deps, model=warmup_model)
+    except Exception as e:
+        logger.warning(f"Falha ao aquecer os agentes: {e}")
+        return
+    logger.info("Agentes aquecidos em %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+model_router = ModelRouter(_run_model, AI_FAST_MODEL, AI_PRO_MODEL, enabled=ROUTING_ENABLED)
+
+
+@tracer.start_as_current_span("analyze_skin")
+async def analyze_skin(ai_request: AIRequest) -> AnalysisOutput:
+    async with circuit_breaker.guard():
+        return await model_router.run(ai_request)
+
+
+async def stream_analyze_skin(ai_request: AIRequest) -> AsyncIterator[Tuple[str, Any]]:
+    """Gera ("admitted", None) ao passar pelo circuit breaker e pelo agendador e então eventos ("scores",
+    "concerns", "skin_type", "product") à medida que a saída é produzida, terminando com ("complete",
+    AnalysisOutput).
+
+    Até o início da resposta, erros do provedor passam pela mesma política de retentativas do /analyze (sem
+    hedge, que dobraria o custo do stream); depois disso o stream não é refeito.
+    """
     deps = ai_request.skin_profile
+    tracker = PartialAnalysisTracker()
+    admitted_slot: Optional[AsyncExitStack] = None
+
+    async def attempt() -> Tuple[AsyncExitStack, StreamedRunResult, RunUsage, float]:
+        nonlocal admitted_slot
+        # A primeira tentativa usa a vaga da admissão; as seguintes voltam à fila depois do backoff. A vaga fica na
+        # pilha junto com o stream e só é liberada quando ele termina
+        stack, admitted_slot = admitted_slot, None
+        usage = RunUsage()
+        started = time.perf_counter()
+        try:
+            if stack is None:
+                stack = AsyncExitStack()
+                await stack.enter_async_context(model_scheduler.slot(ai_request.priority))
+                started = time.perf_counter()
+            result = await stack.enter_async_context(dermage_stream_agent.run_stream(
+                ai_request.images,
+                deps=deps,
+                model=resolve_model(AI_PRO_MODEL),
+                usage=usage
+            ))
+        except BaseException as e:
+            await stack.aclose()
+            if isinstance(e, Exception) and not isinstance(e, HTTPException):
+                _record_failure(AI_PRO_MODEL, usage, time.perf_counter() - started, e)
+            raise
+        return stack, result, usage, started
+
+    # A saída em texto JSON é transmitida token a token; argumentos de tool chegam inteiros no Gemini
+    async with circuit_breaker.guard(), AsyncExitStack() as admission:
+        await admission.enter_async_context(model_scheduler.slot(ai_request.priority))
+        admitted_slot = admission
+        yield "admitted", None
+
+        stack, result, usage, started = await retry_policy.call(attempt, key=AI_PRO_MODEL, hedge=False)
+        async with stack:
+            try:
+                async for response in result.stream_response(debounce_by=0.1):
+                    for event in tracker.feed(partial_output(response)):
+                        yield event
 
-    result = await dermage_agent.run(ai_request.images, deps=deps)
+                output = await result.get_output()
+            except Exception as e:
+                _record_failure(AI_PRO_MODEL, usage, time.perf_counter() - started, e)
+                raise
+            usage_tracker.record(AI_PRO_MODEL, usage, time.perf_counter() - started)
 
-    return AnalysisResponse.model_validate(result.output)
+    # Os eventos de produto já ignoram ids fora do catálogo; a rotina final deixa de citá-los
+    for event in tracker.feed(output.model_dump(mode="json"), final=True):
+        yield event
+    yield "complete", drop_unknown_products(output)
@@ -0,0 +1,82 @@
+import logging
+from typing import Any, AsyncIterator, Optional, Tuple
+
+from app.ai.AiServices import analyze_skin, stream_analyze_skin
+from app.cache.AnalysisCache import analysis_cache, analysis_key
+from app.cache.DiskCache import disk_cache
+from app.cache.SingleFlight import SingleFlight
+from app.catalog.ProductCatalog import product_catalog
+from app.images.ImageServices import preprocess_images
+from app.metrics.Metrics import observe_stage
+from app.models.Request import AIRequest
+from app.models.Response import AnalysisOutput, AnalysisResponse
+
+logger = logging.getLogger('uvicorn')
+
+single_flight = SingleFlight()
+
+
+async def _get_cached(key: str) -> Optional[AnalysisOutput]:
+    cached = analysis_cache.get(key)
+    tier = "cache"
+    if cached is None and disk_cache is not None:
+        cached = await disk_cache.get(key)
+        tier = "cache em disco"
+        if cached is not None:
+            analysis_cache.set(key, cached)
+    if cached is None:
+        return None
+
+    # Produtos retirados do catálogo desde a análise: ela é refeita em vez de servida incompleta
+    if product_catalog.unknown_ids(cached.routine.morning + cached.routine.night):
+        logger.info("Análise em cache cita produtos fora do catálogo atual (%s)", key[:12])
+        return None
+    logger.info("Análise servida do %s (%s)", tier, key[:12])
+    return cached
+
+
+def _hydrate(output: AnalysisOutput) -> AnalysisResponse:
+    # Preço, imagem e link vêm sempre do catálogo atual, inclusive para análises em cache
+    with observe_stage("output_validation"):
+        return product_catalog.hydrate(output)
+
+
+async def _store(key: str, output: AnalysisOutput):
+    analysis_cache.set(key, output)
+    if disk_cache is not None:
+        await disk_cache.set(key, output)
+
+
+async def _analyze_and_store(key: str, ai_request: AIRequest) -> AnalysisOutput:
+    images = await preprocess_images(ai_request.images)
+    output = await analyze_skin(ai_request.model_copy(update={"images": images}))
+
+    await _store(key, output)
+    return output
+
+
+async def run_analysis(ai_request: AIRequest) -> AnalysisResponse:
+    key = analysis_key(ai_request)
+
+    cached = await _get_cached(key)
+    if cached is not None:
+        return _hydrate(cached)
+
+    # Reenvios idênticos enquanto a primeira chamada ainda está no modelo aguardam o mesmo resultado
+    return _hydrate(await single_flight.do(key, lambda: _analyze_and_store(key, ai_request)))
+
+
+async def stream_analysis(ai_request: AIRequest) -> AsyncIterator[Tuple[str, Any]]:
+    key = analysis_key(ai_request)
+
+    cached = await _get_cached(key)
+    if cached is not None:
+        yield "complete", _hydrate(cached)
+        return
+
+    images = await preprocess_images(ai_request.images)
+    async for event, value in stream_analyze_skin(ai_request.model_copy(update={"images": images})):
+        if event == "complete":
+            await _store(key, value)
+            value = _hydrate(value)
+        yield event, value
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+
+from fastapi import HTTPException
+from pydantic_ai.exceptions import ModelAPIError
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+
+from app.config.Settings import (
+    CIRCUIT_WINDOW_SIZE, CIRCUIT_MIN_CALLS, CIRCUIT_FAILURE_RATE, CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_SLOW_CALL_RATE, CIRCUIT_OPEN_SECONDS, CIRCUIT_HALF_OPEN_PROBES,
+)
+
+logger = logging.getLogger('uvicorn')
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Abre após muitas falhas ou chamadas lentas na janela recente e falha rápido enquanto aberto.
+
+    Passado o tempo de abertura, deixa passar algumas chamadas de teste (half-open): se todas
+    derem certo o circuito fecha, se alguma falhar ele volta a abrir.
+    Só erros do provedor (ModelAPIError) e timeouts contam como falha. Uma saída inválida do modelo mostra que o
+    provedor respondeu e conta como sucesso; rejeições com HTTPException (fila cheia, entrada inválida) não contam.
+    """
+
+    def __init__(
+            self,
+            window_size: int,
+            min_calls: int,
+            failure_rate: float,
+            slow_call_seconds: float,
+            slow_call_rate: float,
+            open_seconds: float,
+            half_open_probes: int,
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CircuitState.CLOSED
+        # (falhou, lenta) das chamadas mais recentes
+        self._window = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def _transition(self, state: CircuitState):
+        logger.warning("Circuit breaker do provedor: %s -> %s", self.state.value, state.value)
+        self.state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+        elif state == CircuitState.HALF_OPEN:
+            self._probes_started = 0
+            self._probes_succeeded = 0
+        else:
+            self._window.clear()
+
+    def _remaining_open_seconds(self) -> float:
+        return self._opened_at + self.open_seconds - time.monotonic()
+
+    def _reject(self):
+        self.rejected += 1
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de análise temporariamente indisponível. Tente novamente em instantes.",
+            headers={"Retry-After": str(max(1, math.ceil(self._remaining_open_seconds())))}
+        )
+
+    def _before_call(self):
+        if self.state == CircuitState.OPEN:
+            if self._remaining_open_seconds() > 0:
+                self._reject()
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes_started >= self.half_open_probes:
+                self._reject()
+            self._probes_started += 1
+
+    def _record(self, failed: bool, seconds: float):
+        slow = seconds >= self.slow_call_seconds
+        if self.state == CircuitState.HALF_OPEN:
+            if failed or slow:
+                self._transition(CircuitState.OPEN)
+            else:
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.half_open_probes:
+                    self._transition(CircuitState.CLOSED)
+            return
+
+        if self.state != CircuitState.CLOSED:
+            return
+        self._window.append((failed, slow))
+        if len(self._window) < self.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._window) / len(self._window)
+        slow_calls = sum(slow for _, slow in self._window) / len(self._window)
+        if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+            self._transition(CircuitState.OPEN)
+
+    def _release_probe(self):
+        # Chamada de teste que terminou sem resultado conclusivo (cancelada ou rejeitada antes do provedor)
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_started -= 1
+
+    @asynccontextmanager
+    async def guard(self):
+        self._before_call()
+        started = time.perf_counter()
+        try:
+            yield
+        except HTTPException:
+            self._release_probe()
+            raise
+        except (ModelAPIError, asyncio.TimeoutError):
+            self._record(failed=True, seconds=time.perf_counter() - started)
+            raise
+        except Exception:
+            self._record(failed=False, seconds=time.perf_counter() - started)
+            raise
+        except BaseException:
+            self._release_probe()
+            raise
+        self._record(failed=False, seconds=time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        calls = len(self._window)
+        return {
+            "state": self.state.value,
+            "window_calls": calls,
+            "failure_rate": sum(failed for failed, _ in self._window) / calls if calls else 0.0,
+            "slow_call_rate": sum(slow for _, slow in self._window) / calls if calls else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+circuit_breaker = CircuitBreaker(
+    CIRCUIT_WINDOW_SIZE,
+    CIRCUIT_MIN_CALLS,
+    CIRCUIT_FAILURE_RATE,
+    CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_SLOW_CALL_RATE,
+    CIRCUIT_OPEN_SECONDS,
+    CIRCUIT_HALF_OPEN_PROBES,
+)
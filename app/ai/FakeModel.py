@@ -0,0 +1,128 @@
+import asyncio
+import json
+import math
+import random
+from typing import AsyncIterator, Dict, List, Union
+
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, DeltaToolCalls, FunctionModel
+
+from app.models.Response import SkinTypes
+
+SCORE_TAGS = ["acne", "oleosidade", "manchas", "hidratação", "sensibilidade", "linhas finas"]
+
+CONCERNS = {
+    SkinTypes.SECA: "Pele com sinais de desidratação e descamação leve, barreira cutânea comprometida nas bochechas.",
+    SkinTypes.MISTA: "Zona T com oleosidade e poros dilatados, bochechas com hidratação adequada e leve sensibilidade.",
+    SkinTypes.OLEOSA: "Pele oleosa com tendência acneica, comedões na zona T e marcas pós-inflamatórias discretas.",
+    SkinTypes.NORMAL: "Pele equilibrada, com discretas linhas finas na região periorbital e textura uniforme.",
+}
+
+# Id fora do catálogo usado para simular saídas inválidas, rejeitadas pelo validador do agente
+INVALID_PRODUCT_ID = "fake-000"
+
+
+class FakeModelBackend:
+    """Modelo local e determinístico (por semente) que segue o mesmo fluxo do Gemini: chama search_products
+    e devolve uma análise com ids do catálogo, com latência, taxa de erro e de saída inválida configuráveis."""
+
+    def __init__(
+            self,
+            latency_median: float,
+            latency_sigma: float,
+            error_rate: float,
+            error_status: int,
+            invalid_output_rate: float,
+            seed: int,
+    ):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.invalid_output_rate = invalid_output_rate
+        self._random = random.Random(seed)
+        self._models: Dict[str, FunctionModel] = {}
+
+    def model(self, name: str) -> FunctionModel:
+        if name not in self._models:
+            self._models[name] = FunctionModel(
+                self._respond_for(name),
+                stream_function=self._stream_for(name),
+                model_name=name,
+            )
+        return self._models[name]
+
+    def _latency(self) -> float:
+        # Log-normal: mediana fixa e cauda longa, como a latência de um provedor real
+        return self.latency_median * math.exp(self._random.gauss(0, self.latency_sigma))
+
+    def _maybe_fail(self, name: str):
+        if self._random.random() < self.error_rate:
+            raise ModelHTTPError(self.error_status, name, body={"error": {"message": "Falha simulada pelo modelo falso."}})
+
+    def _next_part(self, messages: List[ModelMessage], info: AgentInfo) -> Union[ToolCallPart, TextPart]:
+        products = _searched_products(messages)
+        if products is None:
+            skin_type = self._random.choice(list(SkinTypes))
+            return ToolCallPart("search_products", {"skin_type": skin_type.value})
+
+        output = self._analysis(products)
+        if info.output_tools:
+            return ToolCallPart(info.output_tools[0].name, output)
+        return TextPart(json.dumps(output, ensure_ascii=False))
+
+    def _analysis(self, products: List[dict]) -> dict:
+        skin_types = {skin_type for product in products for skin_type in product.get("skin_types", [])}
+        skin_type = SkinTypes(self._random.choice(sorted(skin_types))) if skin_types else SkinTypes.NORMAL
+        ids = [product["id"] for product in products]
+        morning = self._random.sample(ids, min(2, len(ids)))
+        night = self._random.sample(ids, min(2, len(ids)))
+        if self._random.random() < self.invalid_output_rate:
+            night.append(INVALID_PRODUCT_ID)
+        return {
+            "scores": [
+                {"score_tag": tag, "score_number": self._random.randint(10, 90)}
+                for tag in self._random.sample(SCORE_TAGS, 4)
+            ],
+            "concerns": CONCERNS[skin_type],
+            "skin_type": skin_type.value,
+            "routine": {"morning": morning, "night": night},
+        }
+
+    def _respond_for(self, name: str):
+        async def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+            await asyncio.sleep(self._latency())
+            self._maybe_fail(name)
+            return ModelResponse(parts=[self._next_part(messages, info)])
+
+        return respond
+
+    def _stream_for(self, name: str):
+        async def stream(messages: List[ModelMessage], info: AgentInfo) -> AsyncIterator[Union[str, DeltaToolCalls]]:
+            latency = self._latency()
+            # Um terço até o primeiro token, o restante distribuído entre os pedaços
+            await asyncio.sleep(latency / 3)
+            self._maybe_fail(name)
+            part = self._next_part(messages, info)
+            if isinstance(part, ToolCallPart):
+                await asyncio.sleep(latency * 2 / 3)
+                yield {0: DeltaToolCall(name=part.tool_name, json_args=part.args_as_json_str())}
+                return
+
+            chunks = [part.content[i:i + 32] for i in range(0, len(part.content), 32)]
+            for chunk in chunks:
+                await asyncio.sleep(latency * 2 / 3 / len(chunks))
+                yield chunk
+
+        return stream
+
+
+def _searched_products(messages: List[ModelMessage]):
+    """Produtos retornados pela última chamada a search_products, ou None se ela ainda não aconteceu."""
+    for message in reversed(messages):
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, ToolReturnPart) and part.tool_name == "search_products":
+                    return part.content
+    return None
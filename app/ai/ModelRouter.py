@@ -0,0 +1,129 @@
+import logging
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+
+from app.catalog.ProductCatalog import normalize_term
+from app.config.Settings import (
+    ROUTING_MIN_SCORES, ROUTING_SCORE_MIN, ROUTING_SCORE_MAX, ROUTING_MIN_CONCERNS_CHARS,
+    ROUTING_MIN_ROUTINE_PRODUCTS, ROUTING_CHECK_DECLARED_SKIN_TYPE,
+)
+from app.models.Request import AIRequest, SkinProfileRequest
+from app.models.Response import AnalysisOutput, SkinTypes
+
+logger = logging.getLogger('uvicorn')
+
+
+def _declared_skin_type(profile: SkinProfileRequest) -> Optional[SkinTypes]:
+    for item in profile.questions:
+        if "tipo de pele" in normalize_term(item.question):
+            answer = normalize_term(item.answer)
+            for skin_type in SkinTypes:
+                if skin_type.value in answer:
+                    return skin_type
+    return None
+
+
+def check_analysis(output: AnalysisOutput, profile: SkinProfileRequest) -> List[str]:
+    """Regras de confiança/consistência; qualquer problema retornado faz a análise subir de camada."""
+    problems = []
+    if len(output.scores) < ROUTING_MIN_SCORES:
+        problems.append("poucos_scores")
+    if any(not ROUTING_SCORE_MIN <= score.score_number <= ROUTING_SCORE_MAX for score in output.scores):
+        problems.append("score_fora_do_intervalo")
+    if len({normalize_term(score.score_tag) for score in output.scores}) < len(output.scores):
+        problems.append("scores_duplicados")
+    if len(output.concerns.strip()) < ROUTING_MIN_CONCERNS_CHARS:
+        problems.append("concerns_curto")
+    if min(len(output.routine.morning), len(output.routine.night)) < ROUTING_MIN_ROUTINE_PRODUCTS:
+        problems.append("rotina_incompleta")
+    if ROUTING_CHECK_DECLARED_SKIN_TYPE:
+        declared = _declared_skin_type(profile)
+        if declared is not None and declared != output.skin_type:
+            problems.append("tipo_de_pele_divergente")
+    return problems
+
+
+class _TierStats:
+    def __init__(self, model: str):
+        self.model = model
+        self.calls = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=1024)
+
+    def observe(self, seconds: float, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self._latencies)
+        percentile = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] if latencies else None
+        return {
+            "model": self.model,
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_p50_s": percentile(0.5),
+            "latency_p95_s": percentile(0.95),
+        }
+
+
+class ModelRouter:
+    """Executa primeiro o modelo rápido e só escala para o modelo pro quando a saída não passa nas regras."""
+
+    def __init__(
+            self,
+            run: Callable[[AIRequest, str], Awaitable[AnalysisOutput]],
+            fast_model: str,
+            pro_model: str,
+            enabled: bool = True,
+    ):
+        self._run = run
+        self.enabled = enabled
+        self.fast = _TierStats(fast_model)
+        self.pro = _TierStats(pro_model)
+        self.escalations = 0
+        self.escalation_reasons = Counter()
+
+    async def _run_tier(self, tier: _TierStats, ai_request: AIRequest) -> AnalysisOutput:
+        started = time.perf_counter()
+        try:
+            output = await self._run(ai_request, tier.model)
+        except BaseException:
+            tier.observe(time.perf_counter() - started, failed=True)
+            raise
+        tier.observe(time.perf_counter() - started, failed=False)
+        return output
+
+    async def run(self, ai_request: AIRequest) -> AnalysisOutput:
+        if not self.enabled:
+            return await self._run_tier(self.pro, ai_request)
+
+        try:
+            output = await self._run_tier(self.fast, ai_request)
+            problems = check_analysis(output, ai_request.skin_profile)
+        except HTTPException:
+            # Rejeições do agendador não devem gerar uma segunda chamada
+            raise
+        except Exception as e:
+            logger.warning(f"Modelo rápido falhou, escalando para {self.pro.model}: {e}")
+            problems = ["erro_modelo_rapido"]
+
+        if not problems:
+            return output
+
+        logger.info("Escalando análise para %s: %s", self.pro.model, ", ".join(problems))
+        self.escalations += 1
+        self.escalation_reasons.update(problems)
+        return await self._run_tier(self.pro, ai_request)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "tiers": {"fast": self.fast.snapshot(), "pro": self.pro.snapshot()},
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.fast.calls if self.fast.calls else 0.0,
+            "escalation_reasons": dict(self.escalation_reasons),
+        }
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import pydantic_core
+from pydantic import TypeAdapter, ValidationError
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+
+from app.catalog.ProductCatalog import product_catalog
+from app.models.Response import SkinCareProduct, SkinScore, SkinTypes
+
+_FIELD_ADAPTERS = {
+    "scores": TypeAdapter(List[SkinScore]),
+    "concerns": TypeAdapter(str),
+    "skin_type": TypeAdapter(SkinTypes),
+}
+_ROUTINE_PERIODS = ("morning", "night")
+# Mesmos campos do produto no evento "complete", sem os atributos internos do catálogo
+_PUBLIC_PRODUCT = TypeAdapter(SkinCareProduct)
+
+
+def partial_output(response: ModelResponse) -> Dict[str, Any]:
+    """Interpreta o JSON ainda incompleto da saída estruturada que está sendo gerada."""
+    for part in response.parts:
+        if isinstance(part, TextPart):
+            content = part.content
+        elif isinstance(part, ToolCallPart):
+            if isinstance(part.args, dict):
+                return part.args
+            content = part.args
+        else:
+            continue
+
+        if not content:
+            continue
+        try:
+            data = pydantic_core.from_json(content, allow_partial=True)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return {}
+
+
+class PartialAnalysisTracker:
+    """Emite cada campo da análise uma única vez, assim que ele não pode mais mudar.
+
+    Um campo é considerado completo quando o modelo já começou a escrever o campo seguinte
+    (ou quando a geração termina); o mesmo vale para cada id de produto das rotinas, que é
+    hidratado com os dados do catálogo antes de ser emitido.
+    """
+
+    def __init__(self):
+        self._sent_fields = set()
+        self._sent_products = {period: 0 for period in _ROUTINE_PERIODS}
+
+    def feed(self, data: Dict[str, Any], final: bool = False) -> List[Tuple[str, Any]]:
+        events = []
+        keys = list(data)
+        for index, key in enumerate(keys):
+            complete = final or index < len(keys) - 1
+            if key == "routine":
+                events += self._routine_events(data[key], complete)
+            elif complete and key in _FIELD_ADAPTERS and key not in self._sent_fields:
+                self._sent_fields.add(key)
+                value = _validate(_FIELD_ADAPTERS[key], data[key])
+                if value is not None:
+                    events.append((key, value))
+        return events
+
+    def _routine_events(self, routine: Any, complete: bool) -> List[Tuple[str, Any]]:
+        if not isinstance(routine, dict):
+            return []
+
+        events = []
+        periods = list(routine)
+        for index, period in enumerate(periods):
+            products = routine[period]
+            if period not in _ROUTINE_PERIODS or not isinstance(products, list):
+                continue
+
+            period_complete = complete or index < len(periods) - 1
+            ready = len(products) if period_complete else max(len(products) - 1, 0)
+            for product_id in products[self._sent_products[period]:ready]:
+                product = product_catalog.get(product_id) if isinstance(product_id, str) else None
+                if product is not None:
+                    public = _PUBLIC_PRODUCT.dump_python(product, mode="json")
+                    events.append(("product", {"period": period, "product": public}))
+            self._sent_products[period] = max(self._sent_products[period], ready)
+        return events
+
+
+def _validate(adapter: TypeAdapter, value: Any) -> Optional[Any]:
+    try:
+        return adapter.validate_python(value)
+    except ValidationError:
+        return None
@@ -0,0 +1,67 @@
+import re
+from typing import Dict, List, Tuple
+
+from app.catalog.ProductCatalog import normalize_term
+from app.models.Request import SkinProfileRequest
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Aproximação sem tokenizador: em português o Gemini fica perto de 4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _clean(text: str, max_chars: int) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+def _questions(profile: SkinProfileRequest, max_chars: int) -> List[Tuple[str, str]]:
+    # Perguntas repetidas ficam com a última resposta, na posição da primeira ocorrência
+    answers: Dict[str, Tuple[str, str]] = {}
+    for item in profile.questions:
+        question, answer = _clean(item.question, max_chars), _clean(item.answer, max_chars)
+        if question and answer:
+            key = normalize_term(question)
+            answers[key] = (answers[key][0] if key in answers else question, answer)
+    return list(answers.values())
+
+
+def _others(profile: SkinProfileRequest, max_chars: int) -> List[str]:
+    lines: Dict[Tuple[str, str], str] = {}
+    for entry in profile.others:
+        for key, value in entry.items():
+            key, value = _clean(key, max_chars), _clean(value, max_chars)
+            if value:
+                lines.setdefault((normalize_term(key), normalize_term(value)), f"{key}: {value}" if key else value)
+    return list(lines.values())
+
+
+def render_profile(profile: SkinProfileRequest, max_tokens: int, max_value_chars: int) -> str:
+    """Questionário do paciente em texto compacto: sem duplicatas, espaços normalizados e dentro do orçamento de
+    tokens. As respostas do questionário têm prioridade; as observações livres entram até o orçamento acabar."""
+    lines = ["Questionário do paciente (pergunta: resposta):"]
+    lines += [f"- {question}: {answer}" for question, answer in _questions(profile, max_value_chars)]
+    if len(lines) == 1:
+        lines.append("- (não respondido)")
+
+    others = _others(profile, max_value_chars)
+    if others:
+        lines.append("Outras informações do paciente:")
+
+    used = sum(estimate_tokens(line) + 1 for line in lines)
+    for index, other in enumerate(others):
+        line = f"- {other}"
+        if used + estimate_tokens(line) + 1 > max_tokens:
+            lines.append(f"- (+{len(others) - index} informação(ões) omitida(s) pelo limite de tamanho)")
+            break
+        lines.append(line)
+        used += estimate_tokens(line) + 1
+
+    text = "\n".join(lines)
+    # Um questionário sozinho acima do orçamento é cortado no fim
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
@@ -0,0 +1,117 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Union
+
+import httpx2
+from pydantic_ai.models import Model
+
+from app.config.Settings import (
+    PROVIDER_HTTP2, PROVIDER_MAX_CONNECTIONS, PROVIDER_MAX_KEEPALIVE_CONNECTIONS, PROVIDER_KEEPALIVE_EXPIRY_SECONDS,
+    PROVIDER_TIMEOUT_SECONDS, PROVIDER_CONNECT_TIMEOUT_SECONDS, PROVIDER_WARMUP,
+)
+
+logger = logging.getLogger('uvicorn')
+
+GOOGLE_PREFIX = "google:"
+
+
+class ProviderPool:
+    """Cliente HTTP compartilhado (HTTP/2, keep-alive, limites de pool) para os modelos do Gemini.
+
+    Criado no lifespan de cada worker e aquecido antes da primeira requisição, para que ela não pague a
+    conexão e o handshake TLS. Antes do start (ou para nomes de outros provedores) devolve o nome do modelo.
+    """
+
+    def __init__(
+            self,
+            http2: bool,
+            max_connections: int,
+            max_keepalive_connections: int,
+            keepalive_expiry: float,
+            timeout: float,
+            connect_timeout: float,
+    ):
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._client: Optional[httpx2.AsyncClient] = None
+        self._base_url: Optional[str] = None
+        self._models: Dict[str, Model] = {}
+        self.warmup_ms: Optional[float] = None
+
+    async def start(self, model_names: List[str], warmup: bool = PROVIDER_WARMUP):
+        google_models = [name for name in dict.fromkeys(model_names) if name.startswith(GOOGLE_PREFIX)]
+        if not google_models:
+            return
+
+        from pydantic_ai.models.google import GoogleModel
+        from pydantic_ai.providers.google import GoogleProvider
+
+        self._client = httpx2.AsyncClient(
+            http2=self.http2,
+            limits=httpx2.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx2.Timeout(self.timeout, connect=self.connect_timeout),
+        )
+        provider = GoogleProvider(http_client=self._client)
+        self._base_url = provider.base_url
+        for name in google_models:
+            self._models[name] = GoogleModel(name[len(GOOGLE_PREFIX):], provider=provider)
+
+        if warmup:
+            await self._warm_up()
+
+    async def _warm_up(self):
+        # Uma listagem mínima abre a conexão (TCP, TLS e, com HTTP/2, a sessão multiplexada) e valida a chave
+        started = time.perf_counter()
+        try:
+            response = await self._client.get(
+                f"{self._base_url.rstrip('/')}/v1beta/models",
+                params={"pageSize": 1},
+                headers={"x-goog-api-key": os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY") or ""},
+                timeout=self.connect_timeout * 2,
+            )
+        except httpx2.HTTPError as e:
+            logger.warning(f"Falha ao aquecer a conexão com o provedor: {e!r}")
+            return
+
+        self.warmup_ms = (time.perf_counter() - started) * 1000
+        if response.is_error:
+            logger.warning("Aquecimento da conexão com o provedor respondeu %d", response.status_code)
+        else:
+            logger.info("Conexão com o provedor aquecida em %.0f ms (%s)", self.warmup_ms, response.http_version)
+
+    def model(self, name: str) -> Union[str, Model]:
+        return self._models.get(name, name)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._models.clear()
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "models": list(self._models),
+            "warmup_ms": self.warmup_ms,
+        }
+
+
+provider_pool = ProviderPool(
+    PROVIDER_HTTP2,
+    PROVIDER_MAX_CONNECTIONS,
+    PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
+    PROVIDER_KEEPALIVE_EXPIRY_SECONDS,
+    PROVIDER_TIMEOUT_SECONDS,
+    PROVIDER_CONNECT_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import Counter, defaultdict, deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException
+from opentelemetry import trace
+from pydantic_ai.exceptions import ModelAPIError, ModelHTTPError, UnexpectedModelBehavior
+
+from app.config.Settings import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS, RETRY_MAX_RETRY_AFTER_SECONDS,
+    RETRY_VALIDATION_ATTEMPTS, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES,
+)
+from app.metrics.Tracing import tracer
+
+logger = logging.getLogger('uvicorn')
+
+T = TypeVar("T")
+
+RATE_LIMIT = "rate_limit"
+TRANSPORT = "transport"
+VALIDATION = "validation"
+FATAL = "fatal"
+
+_RETRY_DELAY = re.compile(r"['\"]retryDelay['\"]:\s*['\"](\d+(?:\.\d+)?)s['\"]")
+
+
+def classify_error(exc: BaseException) -> str:
+    if isinstance(exc, ModelHTTPError):
+        if exc.status_code == 429:
+            return RATE_LIMIT
+        if exc.status_code >= 500 or exc.status_code == 408:
+            return TRANSPORT
+        return FATAL
+    if isinstance(exc, UnexpectedModelBehavior):
+        return VALIDATION
+    # Falhas de conexão e timeouts chegam do provedor como ModelAPIError
+    if isinstance(exc, (ModelAPIError, asyncio.TimeoutError)):
+        return TRANSPORT
+    return FATAL
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    if not isinstance(exc, ModelHTTPError):
+        return None
+    if exc.retry_after is not None:
+        return exc.retry_after
+    # O Gemini informa o tempo de espera no corpo (google.rpc.RetryInfo) em vez do cabeçalho
+    match = _RETRY_DELAY.search(str(exc.body))
+    return float(match.group(1)) if match else None
+
+
+class RetryPolicy:
+    """Retentativas por tipo de erro com backoff exponencial e jitter, e hedge opcional por percentil de latência."""
+
+    def __init__(
+            self,
+            max_attempts: int,
+            base_delay: float,
+            max_delay: float,
+            max_retry_after: float,
+            validation_attempts: int,
+            hedge_percentile: Optional[float] = None,
+            hedge_min_samples: int = 20,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.validation_attempts = validation_attempts
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=256))
+        self.retries = Counter()
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def _should_retry(self, kind: str, attempt: int, validation_failures: int) -> bool:
+        if kind == FATAL or attempt >= self.max_attempts:
+            return False
+        if kind == VALIDATION:
+            return validation_failures <= self.validation_attempts
+        return True
+
+    def delay(self, attempt: int, exc: BaseException) -> float:
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        # Full jitter: espera aleatória entre zero e o teto exponencial
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _hedge_delay(self, key: str) -> Optional[float]:
+        latencies = self._latencies[key]
+        if self.hedge_percentile is None or len(latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(int(len(ordered) * self.hedge_percentile), len(ordered) - 1)]
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]], key: str) -> T:
+        hedge_delay = self._hedge_delay(key)
+        if hedge_delay is None:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            self.hedges += 1
+            trace.get_current_span().add_event("hedge", {"hedge.delay_s": hedge_delay})
+            logger.info("Chamada ao modelo %s passou de %.1fs, disparando requisição em paralelo", key, hedge_delay)
+            hedge = asyncio.ensure_future(fn())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.hedges_won += task is hedge
+                        return task.result()
+            # As duas falharam: propaga o erro da requisição original
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, fn: Callable[[], Awaitable[T]], key: str, hedge: bool = True) -> T:
+        attempt = 0
+        validation_failures = 0
+        while True:
+            attempt += 1
+            started = time.perf_counter()
+            try:
+                with tracer.start_as_current_span("model_attempt", attributes={"retry.attempt": attempt, "model": key}):
+                    result = await (self._hedged(fn, key) if hedge else fn())
+            except HTTPException:
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                validation_failures += kind == VALIDATION
+                if not self._should_retry(kind, attempt, validation_failures):
+                    raise
+                delay = self.delay(attempt, e)
+                self.retries[kind] += 1
+                logger.warning(f"Tentativa {attempt} com {key} falhou ({kind}), nova tentativa em {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            # Sem hedge (início de um stream) a duração não é a de uma chamada completa e fica fora do percentil
+            if hedge:
+                self._latencies[key].append(time.perf_counter() - started)
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "retries": dict(self.retries),
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "hedge_delay_s": {key: self._hedge_delay(key) for key in self._latencies},
+        }
+
+
+retry_policy = RetryPolicy(
+    RETRY_MAX_ATTEMPTS,
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+    RETRY_MAX_RETRY_AFTER_SECONDS,
+    RETRY_VALIDATION_ATTEMPTS,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_SAMPLES,
+)
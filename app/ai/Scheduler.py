@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+from fastapi import HTTPException
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+
+from app.config.Settings import MODEL_MAX_CONCURRENCY, MODEL_MAX_QUEUE
+
+
+class ModelScheduler:
+    """Limita as chamadas simultâneas ao provedor e enfileira o excesso por prioridade.
+
+    Prioridades maiores são atendidas primeiro; empates seguem a ordem de chegada.
+    Com a fila cheia a requisição é rejeitada com 503 e um Retry-After estimado.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wait_seconds = deque(maxlen=1024)
+        self._service_seconds = deque(maxlen=128)
+        self.rejected = 0
+
+    def _retry_after(self) -> int:
+        if not self._service_seconds:
+            return 10
+        average = sum(self._service_seconds) / len(self._service_seconds)
+        return max(1, math.ceil(average * (len(self._waiters) + 1) / self.max_concurrency))
+
+    async def _acquire(self, priority: int):
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serviço sobrecarregado. Tente novamente em instantes.",
+                headers={"Retry-After": str(self._retry_after())}
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (-priority, next(self._sequence), waiter)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A vaga já tinha sido repassada a esta chamada
+                self._release()
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # Repassa a vaga diretamente, sem decrementar as ativas
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0):
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        started = time.perf_counter()
+        self._wait_seconds.append(started - queued_at)
+        try:
+            yield
+        finally:
+            self._service_seconds.append(time.perf_counter() - started)
+            self._release()
+
+    def stats(self) -> dict:
+        waits = sorted(self._wait_seconds)
+        percentile = lambda p: waits[min(int(len(waits) * p), len(waits) - 1)] if waits else None
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "wait_p50_s": percentile(0.5),
+            "wait_p95_s": percentile(0.95),
+        }
+
+
+model_scheduler = ModelScheduler(MODEL_MAX_CONCURRENCY, MODEL_MAX_QUEUE)
@@ -0,0 +1,84 @@
+import json
+import logging
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict
+
+from pydantic_ai.usage import RunUsage
+
+logger = logging.getLogger('uvicorn')
+
+# Definido por cada rota de análise; tarefas em segundo plano herdam o valor de quem as criou
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="unknown")
+
+
+class _UsageTotals:
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tool_calls = 0
+        self.cost_usd = 0.0
+        self.seconds = 0.0
+
+    def add(self, usage: RunUsage, seconds: float, failed: bool):
+        self.runs += 1
+        self.seconds += seconds
+        self.failures += failed
+        self.requests += usage.requests
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+        self.tool_calls += usage.tool_calls
+        self.cost_usd += float(usage.cost or 0)
+
+    def snapshot(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "model_requests": self.requests,
+            "model_requests_per_run": self.requests / self.runs if self.runs else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "tool_calls": self.tool_calls,
+            "cost_usd": round(self.cost_usd, 6),
+            "avg_seconds": self.seconds / self.runs if self.runs else 0.0,
+        }
+
+
+class UsageTracker:
+    """Acumula tokens, requisições ao modelo (incluindo retentativas de validação), custo e tempo por execução."""
+
+    def __init__(self):
+        self._by_model: Dict[str, _UsageTotals] = defaultdict(_UsageTotals)
+        self._by_endpoint: Dict[str, _UsageTotals] = defaultdict(_UsageTotals)
+
+    def record(self, model: str, usage: RunUsage, seconds: float, failed: bool = False):
+        """Registra uma execução do agente. Execuções que falharam também contam o que já consumiram, como as
+        retentativas de validação esgotadas."""
+        endpoint = current_endpoint.get()
+        self._by_model[model].add(usage, seconds, failed)
+        self._by_endpoint[endpoint].add(usage, seconds, failed)
+
+        logger.info(json.dumps({
+            "event": "analysis_usage",
+            "model": model,
+            "endpoint": endpoint,
+            "ok": not failed,
+            "model_requests": usage.requests,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "tool_calls": usage.tool_calls,
+            "cost_usd": float(usage.cost) if usage.cost is not None else None,
+            "duration_ms": round(seconds * 1000, 1),
+        }))
+
+    def stats(self) -> dict:
+        return {
+            "by_model": {model: totals.snapshot() for model, totals in self._by_model.items()},
+            "by_endpoint": {endpoint: totals.snapshot() for endpoint, totals in self._by_endpoint.items()},
+        }
+
+
+usage_tracker = UsageTracker()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config.Settings import (
+    ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_CACHE_TTL_SECONDS, ANALYSIS_CACHE_NAMESPACE,
+    IMAGE_PREPROCESS_ENABLED, IMAGE_MAX_EDGE, IMAGE_OUTPUT_FORMAT, IMAGE_QUALITY,
+)
+from app.models.Request import AIRequest
+from app.models.Response import AnalysisOutput
+
+
+def analysis_key(ai_request: AIRequest) -> str:
+    """Hash do perfil normalizado, das imagens recebidas e da configuração que afeta o resultado."""
+    digest = hashlib.sha256()
+    digest.update(ANALYSIS_CACHE_NAMESPACE.encode())
+    digest.update(
+        f"{IMAGE_PREPROCESS_ENABLED}:{IMAGE_MAX_EDGE}:{IMAGE_OUTPUT_FORMAT}:{IMAGE_QUALITY}".encode()
+    )
+    profile = json.dumps(
+        ai_request.skin_profile.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    digest.update(profile.encode())
+    for image in ai_request.images or []:
+        digest.update(hashlib.sha256(image.data).digest())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Cache LRU em memória com expiração por TTL, da saída do modelo (com os ids da rotina, sem os produtos)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, Tuple[float, AnalysisOutput]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[AnalysisOutput]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, output = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return output
+
+    def set(self, key: str, output: AnalysisOutput):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, output)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+analysis_cache = AnalysisCache(ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_CACHE_TTL_SECONDS)
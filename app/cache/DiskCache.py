@@ -0,0 +1,146 @@
+import logging
+import sqlite3
+import time
+import zlib
+from collections import deque
+from typing import Optional
+
+from app.config.Settings import ANALYSIS_DISK_CACHE_PATH, ANALYSIS_DISK_CACHE_MAX_BYTES, ANALYSIS_CACHE_TTL_SECONDS
+from app.models.Response import AnalysisOutput
+from app.storage.SqliteDatabase import SqliteDatabase
+
+logger = logging.getLogger('uvicorn')
+
+# O total de bytes é mantido por triggers na mesma transação de cada escrita, correto para todos os workers sem
+# somar a tabela inteira a cada gravação
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS analyses_accessed_at ON analyses (accessed_at);
+CREATE TABLE IF NOT EXISTS analyses_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL);
+INSERT OR IGNORE INTO analyses_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM analyses;
+CREATE TRIGGER IF NOT EXISTS analyses_size_insert AFTER INSERT ON analyses
+BEGIN UPDATE analyses_size SET total = total + new.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS analyses_size_update AFTER UPDATE OF size ON analyses
+BEGIN UPDATE analyses_size SET total = total + new.size - old.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS analyses_size_delete AFTER DELETE ON analyses
+BEGIN UPDATE analyses_size SET total = total - old.size WHERE id = 0; END;
+COMMIT;
+"""
+
+# Leituras só gravam o horário de acesso quando ele está mais velho que isso: a ordem LRU fica aproximada, mas um
+# acerto não disputa o único escritor do SQLite
+ACCESS_UPDATE_SECONDS = 60
+
+
+class DiskAnalysisCache:
+    """Cache persistente em SQLite com payloads comprimidos e limite de tamanho total.
+
+    Todo acesso ao banco passa por uma única thread dedicada, mantendo o event loop livre.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._db = SqliteDatabase(path, _SCHEMA, "analysis-cache")
+        self._lookup_seconds = deque(maxlen=1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key: str) -> Optional[bytes]:
+        connection = self._db.connection()
+        row = connection.execute(
+            "SELECT payload, created_at, accessed_at FROM analyses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        payload, created_at, accessed_at = row
+        now = time.time()
+        if created_at + self.ttl_seconds < now:
+            connection.execute("DELETE FROM analyses WHERE key = ?", (key,))
+            return None
+
+        if now - accessed_at >= ACCESS_UPDATE_SECONDS:
+            connection.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+        return payload
+
+    def _set(self, key: str, payload: bytes):
+        connection = self._db.connection()
+        now = time.time()
+        # Upsert em vez de INSERT OR REPLACE: a substituição não dispararia o trigger de remoção
+        connection.execute(
+            "INSERT INTO analyses (key, payload, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET payload = excluded.payload, size = excluded.size, "
+            "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+            (key, payload, len(payload), now, now)
+        )
+        self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection):
+        total = connection.execute("SELECT total FROM analyses_size WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        expired = []
+        rows = connection.execute("SELECT key, size FROM analyses ORDER BY accessed_at")
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        rows.close()
+        connection.executemany("DELETE FROM analyses WHERE key = ?", expired)
+        self.evictions += len(expired)
+
+    async def get(self, key: str) -> Optional[AnalysisOutput]:
+        started = time.perf_counter()
+        try:
+            payload = await self._db.run(self._get, key)
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao ler o cache em disco: {e}")
+            payload = None
+        self._lookup_seconds.append(time.perf_counter() - started)
+
+        if payload is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return AnalysisOutput.model_validate_json(zlib.decompress(payload))
+
+    async def set(self, key: str, output: AnalysisOutput):
+        payload = zlib.compress(output.model_dump_json().encode(), 6)
+        try:
+            await self._db.run(self._set, key, payload)
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao gravar no cache em disco: {e}")
+
+    def close(self):
+        self._db.close()
+
+    def stats(self) -> dict:
+        lookups = sorted(self._lookup_seconds)
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "lookup_p50_ms": lookups[len(lookups) // 2] * 1000 if lookups else None,
+            "lookup_p99_ms": lookups[int(len(lookups) * 0.99)] * 1000 if lookups else None,
+        }
+
+
+disk_cache: Optional[DiskAnalysisCache] = (
+    DiskAnalysisCache(ANALYSIS_DISK_CACHE_PATH, ANALYSIS_DISK_CACHE_MAX_BYTES, ANALYSIS_CACHE_TTL_SECONDS)
+    if ANALYSIS_DISK_CACHE_PATH else None
+)
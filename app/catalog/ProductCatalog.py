@@ -0,0 +1,115 @@
+import bisect
+import logging
+import unicodedata
+from typing import Dict, List, Optional, Set
+
+from pydantic import TypeAdapter
+
+from app.models.Catalog import CatalogProduct
+from app.models.Response import AnalysisOutput, AnalysisResponse, SkinCareRoutine, SkinTypes
+
+logger = logging.getLogger('uvicorn')
+
+_PRODUCTS = TypeAdapter(List[CatalogProduct])
+
+
+def normalize_term(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.strip().lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+class ProductCatalog:
+    """Catálogo Dermage em memória, indexado por categoria, tipo de pele, preocupação e preço."""
+
+    def __init__(self):
+        self._products: Dict[str, CatalogProduct] = {}
+        self._by_category: Dict[str, Set[str]] = {}
+        self._by_skin_type: Dict[SkinTypes, Set[str]] = {}
+        self._by_concern: Dict[str, Set[str]] = {}
+        # Ids ordenados por preço, com a lista de preços paralela para cortes com bisect
+        self._ids_by_price: List[str] = []
+        self._prices: List[float] = []
+
+    def load(self, path: str, required: bool = False):
+        """Carrega o catálogo; com required, sem um arquivo válido a aplicação não sobe, em vez de servir
+        análises com a busca vazia."""
+        try:
+            with open(path, "rb") as file:
+                products = _PRODUCTS.validate_json(file.read())
+        except FileNotFoundError:
+            if required:
+                raise RuntimeError(f"Catálogo de produtos não encontrado em {path}.")
+            logger.warning(f"Catálogo de produtos não encontrado em {path}; a busca retornará vazio.")
+            products = []
+
+        self.__init__()
+        for product in products:
+            self._products[product.id] = product
+            self._by_category.setdefault(normalize_term(product.category), set()).add(product.id)
+            for skin_type in product.skin_types:
+                self._by_skin_type.setdefault(skin_type, set()).add(product.id)
+            for concern in product.concerns:
+                self._by_concern.setdefault(normalize_term(concern), set()).add(product.id)
+        ordered = sorted(products, key=lambda product: product.price)
+        self._ids_by_price = [product.id for product in ordered]
+        self._prices = [product.price for product in ordered]
+        logger.info("Catálogo carregado: %d produtos", len(self._products))
+
+    def get(self, product_id: str) -> Optional[CatalogProduct]:
+        return self._products.get(product_id)
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted(self._by_category)
+
+    @property
+    def concerns(self) -> List[str]:
+        return sorted(self._by_concern)
+
+    def search(
+            self,
+            category: Optional[str] = None,
+            skin_type: Optional[SkinTypes] = None,
+            concern: Optional[str] = None,
+            max_price: Optional[float] = None,
+            limit: int = 10,
+    ) -> List[CatalogProduct]:
+        candidates: Optional[Set[str]] = None
+        for index, term in (
+                (self._by_category, category and normalize_term(category)),
+                (self._by_skin_type, skin_type),
+                (self._by_concern, concern and normalize_term(concern)),
+        ):
+            if not term:
+                continue
+            matches = index.get(term, set())
+            candidates = matches if candidates is None else candidates & matches
+
+        if candidates is not None:
+            products = sorted((self._products[product_id] for product_id in candidates), key=lambda p: p.price)
+            return [product for product in products if max_price is None or product.price <= max_price][:limit]
+
+        end = len(self._prices) if max_price is None else bisect.bisect_right(self._prices, max_price)
+        return [self._products[product_id] for product_id in self._ids_by_price[:min(end, limit)]]
+
+    def unknown_ids(self, product_ids: List[str]) -> List[str]:
+        return [product_id for product_id in product_ids if product_id not in self._products]
+
+    def hydrate(self, output: AnalysisOutput) -> AnalysisResponse:
+        """Troca os ids da rotina pelos produtos completos do catálogo."""
+        # Tudo já foi validado (saída do agente e produtos do catálogo), então não há por que validar de novo
+        return AnalysisResponse.model_construct(
+            scores=output.scores,
+            concerns=output.concerns,
+            skin_type=output.skin_type,
+            routine=SkinCareRoutine.model_construct(
+                morning=[self._products[product_id] for product_id in output.routine.morning],
+                night=[self._products[product_id] for product_id in output.routine.night],
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+
+product_catalog = ProductCatalog()
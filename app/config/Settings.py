@@ -0,0 +1,171 @@
+import os
+import sys
+
+from PIL import Image
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _image_format(name: str, default: str) -> str:
+    # Um formato que o Pillow não grava só apareceria no primeiro upload, como KeyError/500 no pré-processamento
+    value = os.getenv(name, default).upper()
+    Image.init()
+    if value not in Image.SAVE:
+        raise ValueError(f"{name}={value} não é um formato que o Pillow grava; use um de: {', '.join(sorted(Image.SAVE))}.")
+    return value
+
+
+# Ingestão de imagens
+MAX_IMAGE_BYTES = _int("MAX_IMAGE_BYTES", 10 * 1024 * 1024)
+MAX_REQUEST_IMAGE_BYTES = _int("MAX_REQUEST_IMAGE_BYTES", 30 * 1024 * 1024)
+
+# Limites de tamanho e complexidade das requisições de análise
+# Corpo inteiro (imagens, skinData e o envelope multipart), recusado com 413 antes do parsing
+MAX_REQUEST_BODY_BYTES = _int("MAX_REQUEST_BODY_BYTES", MAX_REQUEST_IMAGE_BYTES + 1024 * 1024)
+MAX_IMAGES = _int("MAX_IMAGES", 5)
+MAX_SKIN_DATA_CHARS = _int("MAX_SKIN_DATA_CHARS", 64 * 1024)
+MAX_QUESTIONS = _int("MAX_QUESTIONS", 100)
+MAX_QUIZ_TEXT_CHARS = _int("MAX_QUIZ_TEXT_CHARS", 1000)
+MAX_OTHERS = _int("MAX_OTHERS", 50)
+MAX_OTHER_KEYS = _int("MAX_OTHER_KEYS", 20)
+MAX_OTHER_TEXT_CHARS = _int("MAX_OTHER_TEXT_CHARS", 2000)
+
+# Rate limiting por cliente (token bucket), pela chave de API (X-API-Key) ou pelo IP
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# POST /analyze e /analyze/stream dividem o mesmo bucket: taxa sustentada por minuto e tamanho da rajada
+RATE_LIMIT_ANALYZE_PER_MINUTE = _int("RATE_LIMIT_ANALYZE_PER_MINUTE", 10)
+RATE_LIMIT_ANALYZE_BURST = _int("RATE_LIMIT_ANALYZE_BURST", 5)
+# Polling de jobs (GET /analyze/{job_id})
+RATE_LIMIT_JOBS_PER_MINUTE = _int("RATE_LIMIT_JOBS_PER_MINUTE", 120)
+RATE_LIMIT_JOBS_BURST = _int("RATE_LIMIT_JOBS_BURST", 30)
+# Vazio mantém os buckets em memória, por worker; "redis://..." compartilha entre workers e instâncias (pacote redis)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+RATE_LIMIT_MAX_KEYS = _int("RATE_LIMIT_MAX_KEYS", 100_000)
+# Chaves de API emitidas, separadas por vírgula; só elas ganham bucket próprio, qualquer outra conta pelo IP
+RATE_LIMIT_API_KEYS = [key.strip() for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip()]
+
+# Pré-processamento de imagens
+IMAGE_PREPROCESS_ENABLED = os.getenv("IMAGE_PREPROCESS_ENABLED", "true").lower() == "true"
+IMAGE_MAX_EDGE = _int("IMAGE_MAX_EDGE", 1536)
+IMAGE_OUTPUT_FORMAT = _image_format("IMAGE_OUTPUT_FORMAT", "JPEG")
+IMAGE_QUALITY = _int("IMAGE_QUALITY", 85)
+IMAGE_PREPROCESS_WORKERS = _int("IMAGE_PREPROCESS_WORKERS", min(2, os.cpu_count() or 1))
+
+# Cache de análises
+ANALYSIS_CACHE_MAX_ENTRIES = _int("ANALYSIS_CACHE_MAX_ENTRIES", 256)
+ANALYSIS_CACHE_TTL_SECONDS = _int("ANALYSIS_CACHE_TTL_SECONDS", 24 * 60 * 60)
+# Altere ao mudar o prompt ou o modelo para invalidar as análises já armazenadas
+ANALYSIS_CACHE_NAMESPACE = os.getenv("ANALYSIS_CACHE_NAMESPACE", "v4")
+# Deixe vazio para desativar a persistência em disco
+ANALYSIS_DISK_CACHE_PATH = os.getenv("ANALYSIS_DISK_CACHE_PATH", "data/analysis_cache.sqlite3")
+ANALYSIS_DISK_CACHE_MAX_BYTES = _int("ANALYSIS_DISK_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+
+# Modo assíncrono (jobs)
+JOB_MAX_PENDING = _int("JOB_MAX_PENDING", 100)
+JOB_TTL_SECONDS = _int("JOB_TTL_SECONDS", 60 * 60)
+# Estado dos jobs compartilhado entre os workers, para o polling funcionar em qualquer um; vazio mantém só em memória
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "data/jobs.sqlite3")
+# Tempo que um worker encerrando espera os jobs em andamento antes de cancelá-los
+JOB_SHUTDOWN_GRACE_SECONDS = float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", 60))
+
+# Modelos e roteamento por camadas
+AI_FAST_MODEL = os.getenv("AI_FAST_MODEL", "google:gemini-2.5-flash")
+AI_PRO_MODEL = os.getenv("AI_PRO_MODEL", "google:gemini-2.5-pro")
+ROUTING_ENABLED = os.getenv("ROUTING_ENABLED", "true").lower() == "true"
+ROUTING_MIN_SCORES = _int("ROUTING_MIN_SCORES", 3)
+ROUTING_SCORE_MIN = float(os.getenv("ROUTING_SCORE_MIN", 0))
+ROUTING_SCORE_MAX = float(os.getenv("ROUTING_SCORE_MAX", 100))
+ROUTING_MIN_CONCERNS_CHARS = _int("ROUTING_MIN_CONCERNS_CHARS", 40)
+ROUTING_MIN_ROUTINE_PRODUCTS = _int("ROUTING_MIN_ROUTINE_PRODUCTS", 1)
+ROUTING_CHECK_DECLARED_SKIN_TYPE = os.getenv("ROUTING_CHECK_DECLARED_SKIN_TYPE", "true").lower() == "true"
+
+# Questionário no prompt: orçamento aproximado de tokens e tamanho máximo de cada pergunta, resposta ou observação
+PROFILE_PROMPT_MAX_TOKENS = _int("PROFILE_PROMPT_MAX_TOKENS", 800)
+PROFILE_PROMPT_MAX_VALUE_CHARS = _int("PROFILE_PROMPT_MAX_VALUE_CHARS", 300)
+
+# Pool de conexões com o provedor, criado no lifespan de cada worker
+PROVIDER_HTTP2 = os.getenv("PROVIDER_HTTP2", "true").lower() == "true"
+PROVIDER_MAX_CONNECTIONS = _int("PROVIDER_MAX_CONNECTIONS", 100)
+PROVIDER_MAX_KEEPALIVE_CONNECTIONS = _int("PROVIDER_MAX_KEEPALIVE_CONNECTIONS", 20)
+PROVIDER_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY_SECONDS", 120))
+PROVIDER_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", 300))
+PROVIDER_CONNECT_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_CONNECT_TIMEOUT_SECONDS", 5))
+PROVIDER_WARMUP = os.getenv("PROVIDER_WARMUP", "true").lower() == "true"
+# "fake" troca o Gemini por um modelo local determinístico, para testes de carga e desenvolvimento offline
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini").lower()
+FAKE_LATENCY_MEDIAN_SECONDS = float(os.getenv("FAKE_LATENCY_MEDIAN_SECONDS", 2.0))
+# Desvio padrão do logaritmo da latência; 0 deixa todas as respostas com a mediana
+FAKE_LATENCY_SIGMA = float(os.getenv("FAKE_LATENCY_SIGMA", 0.5))
+FAKE_ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", 0))
+FAKE_ERROR_STATUS = _int("FAKE_ERROR_STATUS", 503)
+FAKE_INVALID_OUTPUT_RATE = float(os.getenv("FAKE_INVALID_OUTPUT_RATE", 0))
+FAKE_SEED = _int("FAKE_SEED", 42)
+
+# Agendador de chamadas ao modelo. Com vários workers (python -m app.server) os limites valem para a implantação
+# e cada worker recebe a sua parte
+MODEL_MAX_CONCURRENCY = _int("MODEL_MAX_CONCURRENCY", 8)
+MODEL_MAX_QUEUE = _int("MODEL_MAX_QUEUE", 32)
+# Prioridades somadas a partir dos cabeçalhos X-Client-Tier e X-Retry-Attempt. Só ligue atrás de um gateway que
+# os defina e descarte os enviados pelo cliente; exposto diretamente, qualquer cliente furaria a fila
+PRIORITY_HEADERS_TRUSTED = os.getenv("PRIORITY_HEADERS_TRUSTED", "false").lower() == "true"
+PRIORITY_PAID = _int("PRIORITY_PAID", 2)
+PRIORITY_RETRY = _int("PRIORITY_RETRY", 1)
+
+# Política de retentativas
+RETRY_MAX_ATTEMPTS = _int("RETRY_MAX_ATTEMPTS", 3)
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", 0.5))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", 20))
+RETRY_MAX_RETRY_AFTER_SECONDS = float(os.getenv("RETRY_MAX_RETRY_AFTER_SECONDS", 60))
+# Retentativas de validação feitas pelo próprio agente (reenviam toda a conversa, incluindo as imagens)
+RETRY_OUTPUT_RETRIES = _int("RETRY_OUTPUT_RETRIES", 1)
+# Execuções completas adicionais quando o agente esgota as retentativas de validação
+RETRY_VALIDATION_ATTEMPTS = _int("RETRY_VALIDATION_ATTEMPTS", 1)
+# Percentil de latência (ex.: 0.95) após o qual uma segunda requisição é disparada; vazio desativa
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE")) if os.getenv("HEDGE_PERCENTILE") else None
+HEDGE_MIN_SAMPLES = _int("HEDGE_MIN_SAMPLES", 20)
+
+# Circuit breaker do provedor (as chamadas de teste em meio-aberto também são divididas entre os workers)
+CIRCUIT_WINDOW_SIZE = _int("CIRCUIT_WINDOW_SIZE", 20)
+CIRCUIT_MIN_CALLS = _int("CIRCUIT_MIN_CALLS", 10)
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", 0.5))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", 90))
+CIRCUIT_SLOW_CALL_RATE = float(os.getenv("CIRCUIT_SLOW_CALL_RATE", 0.8))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", 30))
+CIRCUIT_HALF_OPEN_PROBES = _int("CIRCUIT_HALF_OPEN_PROBES", 2)
+
+# Catálogo de produtos exportado da loja (ex.: data/catalog.json). Sem ele é usado o catálogo de exemplo, com
+# preços e imagens fictícios, e com o Gemini a aplicação avisa na inicialização
+SAMPLE_CATALOG_PATH = "app/data/catalog.json"
+CATALOG_PATH = os.getenv("CATALOG_PATH") or SAMPLE_CATALOG_PATH
+CATALOG_SEARCH_LIMIT = _int("CATALOG_SEARCH_LIMIT", 8)
+
+# Tracing (OpenTelemetry)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+# "otlp" usa as variáveis padrão OTEL_EXPORTER_OTLP_*; "file" grava um span JSON por linha
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "otlp")
+TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", "data/traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "dermage-api")
+
+# Servidor de produção (python -m app.server)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = _int("SERVER_PORT", 8000)
+# 0 usa um worker por núcleo disponível (respeitando a cota de CPU do contêiner)
+SERVER_WORKERS = _int("SERVER_WORKERS", 0)
+SERVER_LOOP = os.getenv("SERVER_LOOP", "asyncio" if sys.platform == "win32" else "uvloop")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "httptools")
+# IPs (ou "*") dos proxies cujo X-Forwarded-For é aceito como IP do cliente; conexões de outros IPs usam o próprio
+SERVER_FORWARDED_ALLOW_IPS = os.getenv("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")
+SERVER_BACKLOG = _int("SERVER_BACKLOG", 2048)
+# Acima do tempo ocioso típico dos balanceadores (60 s), para que sejam eles a fechar a conexão
+SERVER_KEEP_ALIVE_SECONDS = _int("SERVER_KEEP_ALIVE_SECONDS", 75)
+# Uma análise pode levar minutos no modelo; o encerramento aguarda as requisições em andamento
+SERVER_GRACEFUL_TIMEOUT_SECONDS = _int("SERVER_GRACEFUL_TIMEOUT_SECONDS", 120)
+# Reciclagem de workers: após N requisições (mais um jitter) ou acima de um limite de memória residente (0 desativa).
+# Ligada pelo app.server quando há mais de um worker, já que só então o supervisor repõe o processo encerrado
+WORKER_RECYCLING_ENABLED = os.getenv("WORKER_RECYCLING_ENABLED", "false").lower() == "true"
+SERVER_MAX_REQUESTS = _int("SERVER_MAX_REQUESTS", 5000)
+SERVER_MAX_REQUESTS_JITTER = _int("SERVER_MAX_REQUESTS_JITTER", 500)
+WORKER_MAX_MEMORY_MB = _int("WORKER_MAX_MEMORY_MB", 1536)
+WORKER_MEMORY_CHECK_SECONDS = _int("WORKER_MEMORY_CHECK_SECONDS", 15)
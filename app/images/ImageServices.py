@@ -0,0 +1,161 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from fastapi import HTTPException, UploadFile
+from opentelemetry import trace
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pydantic_ai import BinaryContent
+from starlette.status import HTTP_413_CONTENT_TOO_LARGE, HTTP_422_UNPROCESSABLE_CONTENT
+
+from app.config.Settings import (
+    MAX_IMAGE_BYTES, MAX_REQUEST_IMAGE_BYTES,
+    IMAGE_PREPROCESS_ENABLED, IMAGE_MAX_EDGE, IMAGE_OUTPUT_FORMAT, IMAGE_QUALITY, IMAGE_PREPROCESS_WORKERS,
+)
+from app.metrics.Tracing import tracer
+
+logger = logging.getLogger('uvicorn')
+
+
+def _check_sizes(images: List[UploadFile]) -> int:
+    # O Starlette já gravou cada upload no spool e preencheu UploadFile.size: os limites valem antes de qualquer leitura
+    total = 0
+    for image in images:
+        if image.size > MAX_IMAGE_BYTES:
+            raise HTTPException(
+                status_code=HTTP_413_CONTENT_TOO_LARGE,
+                detail=f"A imagem {image.filename} excede o limite de {MAX_IMAGE_BYTES} bytes."
+            )
+        total += image.size
+    if total > MAX_REQUEST_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"O total das imagens excede o limite de {MAX_REQUEST_IMAGE_BYTES} bytes por requisição."
+        )
+    return total
+
+
+async def _read_image(image: UploadFile) -> BinaryContent:
+    # Uma única leitura do spool, sem buffer intermediário
+    return BinaryContent(
+        data=await image.read(),
+        media_type=image.content_type,
+        identifier=image.filename
+    )
+
+
+@tracer.start_as_current_span("ingest_images")
+async def ingest_images(images: List[UploadFile]) -> List[BinaryContent]:
+    """Confere os limites de bytes pelos tamanhos já conhecidos e só então lê os uploads, concorrentemente."""
+    started = time.perf_counter()
+    total = _check_sizes(images)
+    binary_images = await asyncio.gather(*(_read_image(image) for image in images))
+
+    trace.get_current_span().set_attributes({"images.count": len(binary_images), "images.bytes": total})
+
+    logger.info(
+        "Ingestão de %d imagem(ns): %d bytes em %.1f ms",
+        len(binary_images), total, (time.perf_counter() - started) * 1000
+    )
+    return list(binary_images)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Sem fork: o processo do servidor já tem threads (executores do SQLite, threadpool do anyio) e um fork
+        # copiaria locks possivelmente travados; o forkserver (spawn no Windows) parte de um processo limpo
+        context = multiprocessing.get_context("spawn" if sys.platform == "win32" else "forkserver")
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_PREPROCESS_WORKERS, mp_context=context)
+    return _executor
+
+
+async def start_image_pool():
+    """Cria o pool no lifespan e sobe seus processos com uma imagem mínima, para que a primeira requisição
+    não pague a criação dos workers nem a importação do Pillow."""
+    if not IMAGE_PREPROCESS_ENABLED:
+        return
+
+    started = time.perf_counter()
+    sample = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(sample, format="JPEG")
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, _downscale, sample.getvalue(), 4, IMAGE_OUTPUT_FORMAT, IMAGE_QUALITY)
+        for _ in range(IMAGE_PREPROCESS_WORKERS)
+    ))
+    logger.info(
+        "Pool de pré-processamento com %d processo(s) pronto em %.0f ms",
+        IMAGE_PREPROCESS_WORKERS, (time.perf_counter() - started) * 1000
+    )
+
+
+def shutdown_image_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _downscale(data: bytes, max_edge: int, output_format: str, quality: int) -> bytes:
+    """Executa no pool de processos: redimensiona, corrige a orientação e re-codifica sem metadados."""
+    with Image.open(io.BytesIO(data)) as source:
+        # Para JPEG, decodifica diretamente numa escala reduzida
+        source.draft("RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        output = io.BytesIO()
+        # Sem exif/icc_profile explícitos o Pillow não copia os metadados originais
+        image.save(output, format=output_format, quality=quality, optimize=True)
+        return output.getvalue()
+
+
+async def _preprocess_image(image: BinaryContent) -> BinaryContent:
+    loop = asyncio.get_running_loop()
+    try:
+        data = await loop.run_in_executor(
+            _get_executor(), _downscale, image.data, IMAGE_MAX_EDGE, IMAGE_OUTPUT_FORMAT, IMAGE_QUALITY
+        )
+    except (UnidentifiedImageError, OSError) as e:
+        logger.error(f"Erro ao decodificar a imagem {image.identifier}: {e}")
+        raise HTTPException(
+            status_code=HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"A imagem {image.identifier} não pôde ser decodificada."
+        )
+
+    return BinaryContent(
+        data=data,
+        media_type=f"image/{IMAGE_OUTPUT_FORMAT.lower()}",
+        identifier=image.identifier
+    )
+
+
+@tracer.start_as_current_span("preprocess_images")
+async def preprocess_images(images: List[BinaryContent]) -> List[BinaryContent]:
+    """Reduz e re-codifica as imagens antes do envio ao modelo, sem bloquear o event loop."""
+    if not IMAGE_PREPROCESS_ENABLED:
+        return images
+
+    started = time.perf_counter()
+    processed = await asyncio.gather(*(_preprocess_image(image) for image in images))
+
+    bytes_in = sum(len(image.data) for image in images)
+    bytes_out = sum(len(image.data) for image in processed)
+    trace.get_current_span().set_attributes({"images.bytes_in": bytes_in, "images.bytes_out": bytes_out})
+    logger.info(
+        "Pré-processamento de %d imagem(ns): %d -> %d bytes em %.1f ms",
+        len(processed), bytes_in, bytes_out, (time.perf_counter() - started) * 1000
+    )
+    return list(processed)
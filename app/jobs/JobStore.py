@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+
+from app.config.Settings import JOB_MAX_PENDING, JOB_TTL_SECONDS, JOB_STORE_PATH, JOB_SHUTDOWN_GRACE_SECONDS
+from app.models.Response import AnalysisJob, AnalysisResponse, JobStatus
+from app.storage.SqliteDatabase import SqliteDatabase
+
+logger = logging.getLogger('uvicorn')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+"""
+
+
+class JobStore:
+    """Executa análises em segundo plano e guarda o estado para consulta por polling.
+
+    Com um caminho configurado, cada mudança de estado é gravada em SQLite, visível para todos os workers.
+    """
+
+    def __init__(self, max_pending: int, ttl_seconds: float, path: Optional[str] = None):
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._db = SqliteDatabase(path, _SCHEMA, "job-store") if path else None
+
+    def _purge(self):
+        now = time.monotonic()
+        for job_id in [job_id for job_id, expires_at in self._expires_at.items() if expires_at < now]:
+            del self._expires_at[job_id]
+            self._jobs.pop(job_id, None)
+
+    def _save(self, job_id: str, payload: str):
+        try:
+            connection = self._db.connection()
+            now = time.time()
+            connection.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, payload, expires_at) VALUES (?, ?, ?)",
+                (job_id, payload, now + self.ttl_seconds)
+            )
+            connection.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao gravar o job {job_id}: {e}")
+
+    def _load(self, job_id: str) -> Optional[str]:
+        row = self._db.connection().execute(
+            "SELECT payload FROM jobs WHERE job_id = ? AND expires_at >= ?", (job_id, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _persist(self, job: AnalysisJob):
+        # A thread única do executor mantém as gravações na ordem das mudanças de estado
+        if self._db is not None:
+            self._db.submit(self._save, job.job_id, job.model_dump_json())
+
+    def submit(self, fn: Callable[[], Awaitable[AnalysisResponse]]) -> AnalysisJob:
+        self._purge()
+        if len(self._tasks) >= self.max_pending:
+            raise HTTPException(
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Muitas análises em andamento. Tente novamente em instantes.",
+                headers={"Retry-After": "30"}
+            )
+
+        job = AnalysisJob(
+            job_id=uuid.uuid4().hex,
+            status=JobStatus.PENDING,
+            created_at=datetime.now(timezone.utc)
+        )
+        self._jobs[job.job_id] = job
+        self._persist(job)
+
+        task = asyncio.create_task(self._run(job, fn))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return job
+
+    async def _run(self, job: AnalysisJob, fn: Callable[[], Awaitable[AnalysisResponse]]):
+        job.status = JobStatus.RUNNING
+        self._persist(job)
+        try:
+            job.result = await fn()
+            job.status = JobStatus.DONE
+        except HTTPException as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e.detail)
+        except asyncio.CancelledError:
+            job.status = JobStatus.FAILED
+            job.error = "Análise interrompida pelo encerramento do servidor. Envie novamente."
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao processar a análise {job.job_id}: {e}")
+            job.status = JobStatus.FAILED
+            job.error = "Erro ao processar a análise."
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            self._expires_at[job.job_id] = time.monotonic() + self.ttl_seconds
+            self._persist(job)
+
+    async def get(self, job_id: str) -> Optional[AnalysisJob]:
+        self._purge()
+        job = self._jobs.get(job_id)
+        if job is not None or self._db is None:
+            return job
+
+        # Job criado por outro worker
+        try:
+            payload = await self._db.run(self._load, job_id)
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao ler o job {job_id}: {e}")
+            return None
+        return AnalysisJob.model_validate_json(payload) if payload else None
+
+    async def shutdown(self, grace_seconds: float = JOB_SHUTDOWN_GRACE_SECONDS):
+        tasks = list(self._tasks.values())
+        if tasks:
+            logger.info("Aguardando %d análise(s) em andamento antes de encerrar", len(tasks))
+            await asyncio.wait(tasks, timeout=grace_seconds)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._db is not None:
+            self._db.close()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._tasks),
+            "max_pending": self.max_pending,
+            "stored": len(self._jobs),
+            "shared_path": self.path,
+        }
+
+
+job_store = JobStore(JOB_MAX_PENDING, JOB_TTL_SECONDS, JOB_STORE_PATH or None)
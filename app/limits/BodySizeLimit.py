@@ -0,0 +1,48 @@
+from typing import Iterable
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.status import HTTP_413_CONTENT_TOO_LARGE
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _too_large(max_bytes: int) -> str:
+    return f"A requisição excede o limite de {max_bytes} bytes."
+
+
+class BodySizeLimitMiddleware:
+    """Recusa com 413 corpos acima do limite antes do parsing do multipart.
+
+    O Content-Length é conferido antes de ler qualquer byte; sem ele (chunked), a contagem acontece durante a
+    leitura e a requisição é interrompida assim que o limite é ultrapassado.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse({"detail": _too_large(self.max_bytes)}, status_code=HTTP_413_CONTENT_TOO_LARGE)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # O FastAPI repassa HTTPException do parsing do corpo ao handler padrão
+                    raise HTTPException(status_code=HTTP_413_CONTENT_TOO_LARGE, detail=_too_large(self.max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
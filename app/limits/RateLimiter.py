@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config.Settings import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_ANALYZE_PER_MINUTE, RATE_LIMIT_ANALYZE_BURST, RATE_LIMIT_JOBS_PER_MINUTE,
+    RATE_LIMIT_JOBS_BURST, RATE_LIMIT_REDIS_URL, RATE_LIMIT_MAX_KEYS, RATE_LIMIT_API_KEYS,
+)
+from app.metrics.Metrics import RATE_LIMITED
+
+logger = logging.getLogger('uvicorn')
+
+
+class RateLimitRule(NamedTuple):
+    bucket: str
+    method: str
+    path: Pattern[str]
+    per_minute: int
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+def _decide(tokens: float, rule: RateLimitRule) -> Tuple[float, Decision]:
+    if tokens >= 1:
+        return tokens - 1, Decision(True, tokens - 1, 0.0)
+    return tokens, Decision(False, tokens, (1 - tokens) / rule.rate)
+
+
+class MemoryBucketStore:
+    """Buckets no próprio processo, com despejo LRU acima de max_keys (um bucket despejado volta cheio, o mesmo
+    estado de um cliente ocioso). Também serve de substituto local do backend compartilhado em testes."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rule: RateLimitRule) -> Decision:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (rule.burst, now))
+        tokens = min(rule.burst, tokens + (now - updated_at) * rule.rate)
+        tokens, decision = _decide(tokens, rule)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return decision
+
+    async def close(self):
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Reabastece e consome no próprio Redis, de forma atômica, usando o relógio do servidor para todos os workers
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """Buckets compartilhados entre workers e instâncias. O pacote redis só é necessário com RATE_LIMIT_REDIS_URL."""
+
+    def __init__(self, url: str, prefix: str = "dermage:ratelimit:"):
+        from redis import asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self._take = self._client.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, rule: RateLimitRule) -> Decision:
+        allowed, tokens = await self._take(keys=[self.prefix + key], args=[rule.rate, rule.burst])
+        tokens = float(tokens)
+        return Decision(bool(allowed), tokens, 0.0 if allowed else (1 - tokens) / rule.rate)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def _hash_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+
+def client_key(headers: Headers, scope: Scope, api_keys: FrozenSet[str] = frozenset()) -> str:
+    """Chave de API, se for uma das emitidas (api_keys guarda só os hashes), ou IP.
+
+    Cabeçalhos arbitrários do cliente não viram chave: bastaria trocá-los a cada requisição para ganhar um bucket
+    cheio e, de quebra, despejar os buckets dos demais.
+    """
+    api_key = headers.get("x-api-key")
+    if api_key:
+        hashed = _hash_key(api_key)
+        if hashed in api_keys:
+            return "key:" + hashed
+    # O uvicorn (proxy_headers) só troca o cliente pelo X-Forwarded-For quando a conexão vem de um proxy listado
+    # em SERVER_FORWARDED_ALLOW_IPS; nos demais casos este é o IP da própria conexão
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimiter:
+    """Token bucket por cliente e por grupo de endpoints.
+
+    Cada regra tem uma taxa sustentada (por minuto) e uma rajada; o cliente começa com a rajada cheia e recupera
+    fichas continuamente. Com um backend compartilhado e ele indisponível, os buckets locais assumem por alguns
+    segundos, em vez de recusar ou liberar tudo.
+    """
+
+    def __init__(self, rules: List[RateLimitRule], store=None, fallback_seconds: float = 30,
+                 api_keys: Iterable[str] = ()):
+        self.rules = rules
+        self.api_keys = frozenset(_hash_key(api_key) for api_key in api_keys)
+        self.local = MemoryBucketStore(RATE_LIMIT_MAX_KEYS)
+        self.store = store or self.local
+        self.fallback_seconds = fallback_seconds
+        self._store_failed_at: Optional[float] = None
+        self.allowed = 0
+        self.rejected: Dict[str, int] = {rule.bucket: 0 for rule in rules}
+        self.store_errors = 0
+
+    def match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.method == method and rule.path.fullmatch(path):
+                return rule
+        return None
+
+    async def take(self, key: str, rule: RateLimitRule) -> Decision:
+        key = f"{rule.bucket}:{key}"
+        store = self.store
+        if store is not self.local and self._store_failed_at is not None:
+            if time.monotonic() - self._store_failed_at < self.fallback_seconds:
+                store = self.local
+            else:
+                self._store_failed_at = None
+
+        try:
+            decision = await store.take(key, rule)
+        except Exception as e:
+            if store is self.local:
+                raise
+            self.store_errors += 1
+            self._store_failed_at = time.monotonic()
+            logger.warning(f"Backend do rate limiting indisponível, usando os buckets locais: {e!r}")
+            decision = await self.local.take(key, rule)
+
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.rejected[rule.bucket] += 1
+            RATE_LIMITED.labels(rule.bucket).inc()
+        return decision
+
+    async def close(self):
+        await self.store.close()
+        if self.store is not self.local:
+            await self.local.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.store).__name__,
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+            "store_errors": self.store_errors,
+            "local_keys": len(self.local),
+        }
+
+
+class RateLimitMiddleware:
+    """Aplica o RateLimiter antes de ler o corpo, respondendo 429 com Retry-After e os cabeçalhos RateLimit."""
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        rule = self.limiter.match(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await self.limiter.take(client_key(Headers(scope=scope), scope, self.limiter.api_keys), rule)
+        if decision.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = str(max(1, math.ceil(decision.retry_after)))
+        response = JSONResponse(
+            {"detail": f"Limite de requisições excedido; tente novamente em {retry_after} s."},
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+            headers={
+                "Retry-After": retry_after,
+                "RateLimit-Limit": str(rule.burst),
+                "RateLimit-Remaining": str(int(decision.remaining)),
+                "RateLimit-Reset": retry_after,
+            },
+        )
+        await response(scope, receive, send)
+
+
+rate_limiter = RateLimiter(
+    [
+        RateLimitRule("analyze", "POST", re.compile(r"/analyze(/stream)?"),
+                      RATE_LIMIT_ANALYZE_PER_MINUTE, RATE_LIMIT_ANALYZE_BURST),
+        RateLimitRule("jobs", "GET", re.compile(r"/analyze/[^/]+"), RATE_LIMIT_JOBS_PER_MINUTE, RATE_LIMIT_JOBS_BURST),
+    ] if RATE_LIMIT_ENABLED else [],
+    RedisBucketStore(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_ENABLED and RATE_LIMIT_REDIS_URL else None,
+    api_keys=RATE_LIMIT_API_KEYS,
+)
@@ -1,19 +1,78 @@
 import logging
-from typing import List
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Tuple
 
+import pydantic_core
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import ValidationError
 from pydantic_ai import BinaryContent
-from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
+from starlette.routing import Match
+from starlette.status import HTTP_413_CONTENT_TOO_LARGE, HTTP_422_UNPROCESSABLE_ENTITY
 
-from fastapi import FastAPI, Request, HTTPException, Form, File, UploadFile, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, Response, HTTPException, Form, File, UploadFile, Depends, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from app.ai.AiServices import analyze_skin
+from app.ai.AiServices import model_router, warm_up_agents
+from app.ai.ProviderPool import provider_pool
+from app.ai.CircuitBreaker import circuit_breaker
+from app.ai.AnalysisPipeline import run_analysis, stream_analysis, single_flight
+from app.ai.RetryPolicy import retry_policy
+from app.ai.Scheduler import model_scheduler
+from app.ai.UsageTracker import current_endpoint, usage_tracker
+from app.cache.AnalysisCache import analysis_cache
+from app.cache.DiskCache import disk_cache
+from app.catalog.ProductCatalog import product_catalog
+from app.config.Settings import (
+    PRIORITY_HEADERS_TRUSTED, PRIORITY_PAID, PRIORITY_RETRY, CATALOG_PATH, AI_FAST_MODEL, AI_PRO_MODEL, MODEL_BACKEND, MAX_REQUEST_BODY_BYTES,
+    MAX_IMAGES, MAX_SKIN_DATA_CHARS, SAMPLE_CATALOG_PATH,
+)
+from app.images.ImageServices import ingest_images, start_image_pool, shutdown_image_pool
+from app.jobs.JobStore import job_store
+from app.limits.BodySizeLimit import BodySizeLimitMiddleware
+from app.limits.RateLimiter import RateLimitMiddleware, rate_limiter
+from app.metrics.Metrics import (
+    HTTP_IN_FLIGHT, HTTP_RESPONSES, STAGE_SECONDS, observe_stage, register_pipeline_collector, render_metrics,
+    mark_worker_dead,
+)
+from app.metrics.Tracing import setup_tracing
 from app.models.Request import SkinProfileRequest, AIRequest
-from app.models.Response import AnalysisResponse
+from app.models.Response import AnalysisResponse, AnalysisJob, JobStatus
+from app.workers.WorkerRecycler import worker_recycler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MODEL_BACKEND != "fake" and CATALOG_PATH == SAMPLE_CATALOG_PATH:
+        logger.warning(
+            "CATALOG_PATH não definido: usando o catálogo de exemplo, com preços e imagens fictícios. "
+            "Aponte-o para o catálogo exportado da loja."
+        )
+    product_catalog.load(CATALOG_PATH, required=MODEL_BACKEND != "fake")
+    if MODEL_BACKEND != "fake":
+        await provider_pool.start([AI_FAST_MODEL, AI_PRO_MODEL])
+    await start_image_pool()
+    await warm_up_agents()
+    worker_recycler.start()
+    yield
+    await worker_recycler.stop()
+    await job_store.shutdown()
+    await rate_limiter.close()
+    await provider_pool.close()
+    shutdown_image_pool()
+    if disk_cache is not None:
+        disk_cache.close()
+    mark_worker_dead()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
+setup_tracing(app)
+
+# Dentro do CORS, para que as respostas 413 também levem os cabeçalhos de CORS
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_REQUEST_BODY_BYTES, paths=["/analyze", "/analyze/stream"])
+# Por fora do limite de tamanho: clientes acima da taxa são recusados sem ler o corpo
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 
 origins = ['*']
 app.add_middleware(
@@ -25,6 +84,39 @@ app.add_middleware(
 )
 
 
+def _route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    # Os middlewares de limite (413/429) respondem antes do roteamento: procura a rota que teria atendido, pelo
+    # template, para não confundir essas rejeições com caminhos inexistentes
+    for candidate in app.router.routes:
+        if candidate.matches(request.scope)[0] == Match.FULL:
+            return candidate.path
+    return "unmatched"
+
+
+@app.middleware("http")
+async def http_metrics(request: Request, call_next):
+    request.state.received_at = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        HTTP_RESPONSES.labels(request.method, _route_label(request), status).inc()
+        worker_recycler.request_finished()
+
+
+def render_analysis(analysis: AnalysisResponse) -> Response:
+    """Serializa a análise, já validada, direto para bytes JSON, sem passar pela validação do response_model."""
+    with observe_stage("response_serialization"):
+        return Response(pydantic_core.to_json(analysis), media_type="application/json")
+
+
 @app.exception_handler(ValidationError)
 async def pydantic_validation_exception_handler(request: Request, exc: ValidationError):
     error_details = [
@@ -49,42 +141,193 @@ async def pydantic_validation_exception_handler(request: Request, exc: Validatio
 logger = logging.getLogger('uvicorn')
 
 
-def get_skin_profile(skin_data: str = Form(..., alias="skinData")) -> SkinProfileRequest:
+def get_skin_profile(request: Request, skin_data: str = Form(..., alias="skinData")) -> SkinProfileRequest:
+    # O FastAPI lê todo o multipart antes de resolver as dependências
+    STAGE_SECONDS.labels("multipart_parsing").observe(time.perf_counter() - request.state.received_at)
+    if len(skin_data) > MAX_SKIN_DATA_CHARS:
+        raise HTTPException(
+            status_code=HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"skinData excede o limite de {MAX_SKIN_DATA_CHARS} caracteres."
+        )
     try:
-        return SkinProfileRequest.model_validate_json(skin_data)
+        with observe_stage("profile_validation"):
+            return SkinProfileRequest.model_validate_json(skin_data)
     except ValidationError as e:
         logger.error(f"Erro na validação dos dados do formulário: {e}")
         raise HTTPException(status_code=HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Erro na validação dos dados do formulário: {e}")
 
 
+def get_priority(
+        x_client_tier: Optional[str] = Header(None),
+        x_retry_attempt: Optional[str] = Header(None),
+) -> int:
+    if not PRIORITY_HEADERS_TRUSTED:
+        return 0
+    priority = 0
+    if x_client_tier and x_client_tier.strip().lower() == "paid":
+        priority += PRIORITY_PAID
+    # Valor inválido apenas não conta como retentativa, sem recusar a análise
+    if x_retry_attempt and x_retry_attempt.strip().isdigit() and int(x_retry_attempt) > 0:
+        priority += PRIORITY_RETRY
+    return priority
+
+
 async def process_images(images: List[UploadFile]) -> List[BinaryContent]:
     if not images:
         logging.warning("Nenhuma imagem fornecida.")
         raise HTTPException(status_code=400, detail="Pelo menos uma imagem é necessária.")
+    if len(images) > MAX_IMAGES:
+        raise HTTPException(
+            status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No máximo {MAX_IMAGES} imagens por análise; foram enviadas {len(images)}."
+        )
     try:
-        binary_images = []
-        for image in images:
-            binary_images.append(BinaryContent(
-                data=await image.read(),
-                media_type=image.content_type,
-                identifier=image.filename
-            ))
-        return binary_images
+        with observe_stage("process_images"):
+            return await ingest_images(images)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Erro ao processar as imagens: {e}")
         raise HTTPException(status_code=500, detail="Erro ao processar as imagens.")
 
 
-@app.post('/analyze', summary='Creates a new skin analysis', response_model=AnalysisResponse)
+@app.post(
+    '/analyze',
+    summary='Creates a new skin analysis',
+    description='Send `Prefer: respond-async` to receive a job id (202) and poll `GET /analyze/{job_id}`.',
+    response_model=AnalysisResponse,
+    responses={202: {"model": AnalysisJob}},
+)
 async def get_analysis(
         skin_profile: SkinProfileRequest = Depends(get_skin_profile),
         images: List[UploadFile] = File(...),
+        prefer: Optional[str] = Header(None),
+        priority: int = Depends(get_priority),
+):
+    images = await process_images(images)
+
+    ai_request = AIRequest(
+        skin_profile=skin_profile,
+        images=images,
+        priority=priority
+    )
+
+    if prefer and "respond-async" in prefer.lower():
+        current_endpoint.set("analyze_async")
+        job = job_store.submit(lambda: run_analysis(ai_request))
+        return JSONResponse(
+            status_code=202,
+            content=job.model_dump(mode="json"),
+            headers={"Location": f"/analyze/{job.job_id}", "Preference-Applied": "respond-async"}
+        )
+
+    current_endpoint.set("analyze")
+    return render_analysis(await run_analysis(ai_request))
+
+
+def _sse(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {pydantic_core.to_json(data).decode()}\n\n"
+
+
+async def _admit_stream(events: AsyncIterator[Tuple[str, Any]]) -> List[Tuple[str, Any]]:
+    # Avança até a admissão no circuit breaker e no agendador (ou até a resposta do cache), antes do 200: uma
+    # rejeição nessa fase chega ao cliente como 503 com Retry-After, e não como evento de erro
+    started = []
+    try:
+        async for event, value in events:
+            if event == "admitted":
+                break
+            started.append((event, value))
+            if event == "complete":
+                break
+    except BaseException:
+        await events.aclose()
+        raise
+    return started
+
+
+async def _analysis_events(started: List[Tuple[str, Any]], events: AsyncIterator[Tuple[str, Any]]):
+    try:
+        for event, value in started:
+            yield _sse(event, value)
+        async for event, value in events:
+            yield _sse(event, value)
+    except HTTPException as e:
+        yield _sse("error", {"detail": e.detail})
+    except Exception as e:
+        logger.error(f"Erro ao transmitir a análise: {e}")
+        yield _sse("error", {"detail": "Erro ao processar a análise."})
+    finally:
+        await events.aclose()
+
+
+@app.post(
+    '/analyze/stream',
+    summary='Creates a new skin analysis streaming partial results',
+    description='Server-Sent Events: `scores`, `concerns`, `skin_type` and one `product` event per routine item '
+                'as soon as each is generated, then `complete` with the full analysis (or `error`). Provider errors '
+                'before the first event are retried like on `/analyze`; once events are flowing the stream is '
+                'best-effort and a failure ends it with `error`.',
+)
+async def stream_analysis_events(
+        skin_profile: SkinProfileRequest = Depends(get_skin_profile),
+        images: List[UploadFile] = File(...),
+        priority: int = Depends(get_priority),
 ):
     images = await process_images(images)
 
     ai_request = AIRequest(
         skin_profile=skin_profile,
-        images=images
+        images=images,
+        priority=priority
     )
 
-    return await analyze_skin(ai_request)
+    current_endpoint.set("analyze_stream")
+    events = stream_analysis(ai_request)
+    started = await _admit_stream(events)
+    return StreamingResponse(
+        _analysis_events(started, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get('/analyze/{job_id}', summary='Returns the status of an asynchronous skin analysis', response_model=AnalysisJob)
+async def get_analysis_job(job_id: str, response: Response):
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Análise não encontrada.")
+
+    if job.status in (JobStatus.PENDING, JobStatus.RUNNING):
+        response.headers["Retry-After"] = "5"
+    return job
+
+
+def pipeline_stats() -> dict:
+    return {
+        "cache": analysis_cache.stats(),
+        "disk_cache": disk_cache.stats() if disk_cache is not None else None,
+        "single_flight": single_flight.stats(),
+        "jobs": job_store.stats(),
+        "router": model_router.stats(),
+        "scheduler": model_scheduler.stats(),
+        "retries": retry_policy.stats(),
+        "circuit_breaker": circuit_breaker.stats(),
+        "provider": provider_pool.stats(),
+        "usage": usage_tracker.stats(),
+        "worker": worker_recycler.stats(),
+        "rate_limit": rate_limiter.stats(),
+    }
+
+
+register_pipeline_collector(pipeline_stats)
+
+
+@app.get('/stats', summary='Returns runtime statistics of the analysis pipeline')
+async def get_stats():
+    return pipeline_stats()
+
+
+@app.get('/metrics', include_in_schema=False)
+async def get_metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,127 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+# Definido pelo app.server com vários workers: as métricas nativas passam a ser agregadas entre os processos
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+STAGE_SECONDS = Histogram(
+    "dermage_analyze_stage_seconds",
+    "Duração de cada etapa do /analyze.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160, 300),
+)
+HTTP_RESPONSES = Counter(
+    "dermage_http_responses_total",
+    "Respostas HTTP por rota e status.",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "dermage_http_requests_in_flight",
+    "Requisições HTTP em andamento.",
+    multiprocess_mode="livesum",
+)
+RATE_LIMITED = Counter(
+    "dermage_rate_limited_total",
+    "Requisições recusadas pelo rate limiting, por bucket.",
+    ["bucket"],
+)
+
+
+@contextmanager
+def observe_stage(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+class PipelineCollector(Collector):
+    """Exporta os contadores que os componentes do pipeline já mantêm (ver GET /stats)."""
+
+    def __init__(self, stats):
+        self._stats = stats
+
+    def collect(self):
+        stats = self._stats()
+
+        cache_hits = CounterMetricFamily("dermage_cache_hits", "Acertos de cache.", labels=["tier"])
+        cache_misses = CounterMetricFamily("dermage_cache_misses", "Faltas de cache.", labels=["tier"])
+        for tier, name in (("memory", "cache"), ("disk", "disk_cache")):
+            if stats.get(name):
+                cache_hits.add_metric([tier], stats[name]["hits"])
+                cache_misses.add_metric([tier], stats[name]["misses"])
+        yield cache_hits
+        yield cache_misses
+
+        yield CounterMetricFamily(
+            "dermage_single_flight_coalesced", "Requisições que aguardaram uma análise idêntica em andamento.",
+            value=stats["single_flight"]["coalesced"],
+        )
+        yield GaugeMetricFamily("dermage_jobs_pending", "Jobs assíncronos pendentes.", value=stats["jobs"]["pending"])
+
+        scheduler = stats["scheduler"]
+        yield GaugeMetricFamily("dermage_model_calls_active", "Chamadas ao modelo em execução.", value=scheduler["active"])
+        yield GaugeMetricFamily("dermage_model_queue_depth", "Chamadas ao modelo na fila.", value=scheduler["queued"])
+        yield CounterMetricFamily(
+            "dermage_model_queue_rejected", "Chamadas rejeitadas com a fila cheia.", value=scheduler["rejected"]
+        )
+
+        breaker = GaugeMetricFamily(
+            "dermage_circuit_breaker_state", "Estado do circuit breaker (1 no estado atual).", labels=["state"]
+        )
+        for state in ("closed", "open", "half_open"):
+            breaker.add_metric([state], int(stats["circuit_breaker"]["state"] == state))
+        yield breaker
+
+        yield CounterMetricFamily(
+            "dermage_router_escalations", "Análises escaladas para o modelo pro.", value=stats["router"]["escalations"]
+        )
+
+        tokens = CounterMetricFamily("dermage_model_tokens", "Tokens consumidos por modelo.", labels=["model", "kind"])
+        requests = CounterMetricFamily(
+            "dermage_model_requests", "Requisições ao modelo, incluindo retentativas de validação.", labels=["model"]
+        )
+        cost = CounterMetricFamily("dermage_model_cost_usd", "Custo estimado em USD por modelo.", labels=["model"])
+        for model, totals in stats["usage"]["by_model"].items():
+            tokens.add_metric([model, "input"], totals["input_tokens"])
+            tokens.add_metric([model, "output"], totals["output_tokens"])
+            requests.add_metric([model], totals["model_requests"])
+            cost.add_metric([model], totals["cost_usd"])
+        yield tokens
+        yield requests
+        yield cost
+
+
+_pipeline_collector: Optional[PipelineCollector] = None
+
+
+def register_pipeline_collector(stats):
+    global _pipeline_collector
+    _pipeline_collector = PipelineCollector(stats)
+    if not MULTIPROCESS:
+        REGISTRY.register(_pipeline_collector)
+
+
+def render_metrics() -> bytes:
+    if not MULTIPROCESS:
+        return generate_latest()
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    # Os contadores do pipeline vivem em memória e refletem só o worker que atendeu a coleta
+    if _pipeline_collector is not None:
+        registry.register(_pipeline_collector)
+    return generate_latest(registry)
+
+
+def mark_worker_dead():
+    """Descarta os gauges "live" deste worker ao encerrá-lo."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,51 @@
+import logging
+import os
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from pydantic_ai import Agent
+
+from app.config.Settings import TRACING_ENABLED, TRACING_EXPORTER, TRACING_FILE_PATH, TRACING_SERVICE_NAME
+
+logger = logging.getLogger('uvicorn')
+
+tracer = trace.get_tracer("dermage")
+
+
+def _file_exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    directory = os.path.dirname(TRACING_FILE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return ConsoleSpanExporter(
+        out=open(TRACING_FILE_PATH, "a", encoding="utf-8"),
+        formatter=lambda span: span.to_json(indent=None) + "\n",
+    )
+
+
+def setup_tracing(app: FastAPI):
+    """Configura o exportador e instrumenta o FastAPI e as chamadas do agente; sem efeito se desativado."""
+    if not TRACING_ENABLED:
+        return
+
+    # Dependências do SDK só são importadas com o tracing ligado
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    if TRACING_EXPORTER == "file":
+        exporter = _file_exporter()
+    else:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+
+    provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,stats")
+    # Um span por requisição ao modelo, com tokens e mensagens trocadas (padrão gen_ai)
+    Agent.instrument_all()
+    logger.info("Tracing ativo (exportador: %s)", TRACING_EXPORTER)
@@ -0,0 +1,10 @@
+from typing import List
+
+from app.models.Response import SkinCareProduct, SkinTypes
+
+
+class CatalogProduct(SkinCareProduct):
+    id: str
+    category: str
+    skin_types: List[SkinTypes]
+    concerns: List[str]
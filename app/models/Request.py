@@ -1,18 +1,27 @@
 from typing import List, Dict, Optional
+from typing_extensions import Annotated
 from fastapi import UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, StringConstraints
 from pydantic_ai import BinaryContent
 
+from app.config.Settings import (
+    MAX_QUESTIONS, MAX_QUIZ_TEXT_CHARS, MAX_OTHERS, MAX_OTHER_KEYS, MAX_OTHER_TEXT_CHARS,
+)
+
+QuizText = Annotated[str, StringConstraints(max_length=MAX_QUIZ_TEXT_CHARS)]
+OtherText = Annotated[str, StringConstraints(max_length=MAX_OTHER_TEXT_CHARS)]
+
 
 class QuizQuestion(BaseModel):
-    question: str
-    answer: str
+    question: QuizText
+    answer: QuizText
 
 
 class SkinProfileRequest(BaseModel):
-    questions: List[QuizQuestion]
-    others: List[Dict[str, str]]
+    questions: List[QuizQuestion] = Field(max_length=MAX_QUESTIONS)
+    others: List[Annotated[Dict[OtherText, OtherText], Field(max_length=MAX_OTHER_KEYS)]] = Field(max_length=MAX_OTHERS)
 
 class AIRequest(BaseModel):
     skin_profile: SkinProfileRequest
-    images: Optional[List[BinaryContent]] = None
\ No newline at end of file
+    images: Optional[List[BinaryContent]] = None
+    priority: int = 0
\ No newline at end of file
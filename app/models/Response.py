@@ -1,5 +1,6 @@
+from datetime import datetime
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -30,3 +31,28 @@ class AnalysisResponse(BaseModel):
     skin_type: SkinTypes
     routine: SkinCareRoutine
 
+class SkinCareRoutineIds(BaseModel):
+    morning: List[str]
+    night: List[str]
+
+class AnalysisOutput(BaseModel):
+    """Saída pedida ao modelo: a rotina traz apenas ids do catálogo, hidratados no servidor."""
+    scores: List[SkinScore]
+    concerns: str
+    skin_type: SkinTypes
+    routine: SkinCareRoutineIds
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class AnalysisJob(BaseModel):
+    job_id: str
+    status: JobStatus
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
@@ -0,0 +1,131 @@
+"""Servidor de produção: python -m app.server
+
+Sobe vários workers do uvicorn (um por núcleo disponível, por padrão) com uvloop e httptools, keep-alive,
+backlog e encerramento gracioso configuráveis, e recicla os workers após SERVER_MAX_REQUESTS requisições
+ou quando passam de WORKER_MAX_MEMORY_MB (ver app/workers/WorkerRecycler.py). Os limites de chamadas ao modelo
+valem para a implantação inteira e são divididos entre os workers; o rate limiting em memória é por worker.
+"""
+import glob
+import logging
+import math
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import uvicorn
+
+from app.config.Settings import (
+    SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_LOOP, SERVER_HTTP, SERVER_BACKLOG, SERVER_KEEP_ALIVE_SECONDS,
+    SERVER_FORWARDED_ALLOW_IPS,
+    SERVER_GRACEFUL_TIMEOUT_SECONDS, SERVER_MAX_REQUESTS, WORKER_MAX_MEMORY_MB, MODEL_MAX_CONCURRENCY, MODEL_MAX_QUEUE,
+    CIRCUIT_HALF_OPEN_PROBES, RATE_LIMIT_REDIS_URL,
+)
+
+logger = logging.getLogger('uvicorn')
+
+
+def available_cpus() -> int:
+    """Núcleos que o processo pode usar, limitados pela cota de CPU do cgroup quando há uma (contêineres)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _prepare_multiprocess_metrics() -> Optional[str]:
+    """Prepara o diretório das métricas dos workers e devolve o temporário criado aqui, a remover no encerramento."""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        directory = tempfile.mkdtemp(prefix="dermage-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+        return directory
+
+    # Cada worker grava suas métricas em arquivos *.db; sobras de uma execução anterior distorceriam os totais.
+    # Só esses arquivos saem: o diretório é do operador e pode ter outros conteúdos
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+    return None
+
+
+def _split_limits(workers: int) -> dict:
+    """Divide entre os workers os limites globais do provedor, mantidos em memória por cada um."""
+    per_worker = {
+        "MODEL_MAX_CONCURRENCY": MODEL_MAX_CONCURRENCY // workers,
+        "MODEL_MAX_QUEUE": MODEL_MAX_QUEUE // workers,
+        # Cada worker tem o seu circuit breaker e precisa de ao menos uma chamada de teste para fechá-lo
+        "CIRCUIT_HALF_OPEN_PROBES": max(1, CIRCUIT_HALF_OPEN_PROBES // workers),
+    }
+    # Lidos pelos workers na importação das configurações
+    os.environ.update({name: str(value) for name, value in per_worker.items()})
+    return per_worker
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    workers = SERVER_WORKERS or available_cpus()
+    # Cada worker precisa de ao menos uma vaga de chamada ao modelo sem que o total passe de MODEL_MAX_CONCURRENCY
+    if workers > MODEL_MAX_CONCURRENCY:
+        if SERVER_WORKERS:
+            raise SystemExit(
+                f"SERVER_WORKERS={SERVER_WORKERS} é maior que MODEL_MAX_CONCURRENCY={MODEL_MAX_CONCURRENCY}: "
+                f"reduza os workers ou aumente o limite de chamadas simultâneas ao modelo."
+            )
+        logger.warning(
+            "%d núcleos disponíveis, mas MODEL_MAX_CONCURRENCY=%d: iniciando %d workers",
+            workers, MODEL_MAX_CONCURRENCY, MODEL_MAX_CONCURRENCY
+        )
+        workers = MODEL_MAX_CONCURRENCY
+
+    metrics_directory = None
+    if workers > 1:
+        metrics_directory = _prepare_multiprocess_metrics()
+        # Lido pelos workers na importação das configurações
+        os.environ["WORKER_RECYCLING_ENABLED"] = "true"
+        per_worker = _split_limits(workers)
+        logger.info(
+            "Limites do provedor divididos entre %d workers: %s", workers,
+            ", ".join(f"{name}={value}" for name, value in per_worker.items())
+        )
+        if not RATE_LIMIT_REDIS_URL:
+            logger.warning(
+                "Rate limiting em memória: os buckets são de cada worker, e um cliente com conexões em workers "
+                "diferentes pode chegar a %d vezes o limite; use RATE_LIMIT_REDIS_URL para um limite exato", workers
+            )
+
+    logger.info(
+        "Iniciando %d worker(s) em %s:%d (loop=%s, http=%s, reciclagem=%s)",
+        workers, SERVER_HOST, SERVER_PORT, SERVER_LOOP, SERVER_HTTP,
+        f"{SERVER_MAX_REQUESTS or '-'} requisições / {WORKER_MAX_MEMORY_MB or '-'} MB" if workers > 1 else "desativada"
+    )
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            workers=workers,
+            loop=SERVER_LOOP,
+            http=SERVER_HTTP,
+            backlog=SERVER_BACKLOG,
+            timeout_keep_alive=SERVER_KEEP_ALIVE_SECONDS,
+            timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT_SECONDS,
+            proxy_headers=True,
+            forwarded_allow_ips=SERVER_FORWARDED_ALLOW_IPS,
+        )
+    finally:
+        if metrics_directory:
+            shutil.rmtree(metrics_directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SqliteDatabase:
+    """Conexão SQLite (WAL) compartilhável entre processos, acessada por uma única thread dedicada.
+
+    Funções passadas a run/submit executam nessa thread, em ordem, e usam connection() para obter a conexão,
+    aberta (com o diretório e o esquema criados) no primeiro acesso.
+    """
+
+    def __init__(self, path: str, schema: str, thread_name: str):
+        self.path = path
+        self._schema = schema
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread_name)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=5000")
+            connection.executescript(self._schema)
+            self._connection = connection
+        return self._connection
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def submit(self, fn: Callable[..., T], *args) -> Future:
+        return self._executor.submit(fn, *args)
+
+    def close(self):
+        def _close():
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+import random
+import signal
+from typing import Optional
+
+from app.config.Settings import (
+    WORKER_RECYCLING_ENABLED, SERVER_MAX_REQUESTS, SERVER_MAX_REQUESTS_JITTER, WORKER_MAX_MEMORY_MB,
+    WORKER_MEMORY_CHECK_SECONDS,
+)
+
+logger = logging.getLogger('uvicorn')
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Memória residente atual do processo, lida do /proc; None onde ele não existe (ex.: Windows)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return None
+
+
+class WorkerRecycler:
+    """Encerra o worker com SIGTERM após um número de requisições ou acima de um limite de memória residente;
+    o supervisor do uvicorn sobe outro no lugar.
+
+    O SIGTERM segue o encerramento normal: novas conexões param e as requisições em andamento terminam. O limite
+    de requisições recebe um jitter por worker para que eles não sejam reciclados todos ao mesmo tempo.
+    """
+
+    def __init__(self, max_requests: int, max_requests_jitter: int, max_memory_mb: int, interval_seconds: float):
+        self.max_requests = max_requests + random.randint(0, max_requests_jitter) if max_requests else 0
+        self.max_memory_mb = max_memory_mb
+        self.interval_seconds = interval_seconds
+        self.requests = 0
+        self._recycling = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _recycle(self, reason: str):
+        if self._recycling:
+            return
+        self._recycling = True
+        logger.warning("Reciclando o worker %d: %s", os.getpid(), reason)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def request_finished(self):
+        self.requests += 1
+        if self.max_requests and self.requests >= self.max_requests:
+            self._recycle(f"{self.requests} requisições atendidas")
+
+    async def _watch_memory(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            memory = resident_memory_mb()
+            if memory is None:
+                logger.warning("Memória residente indisponível nesta plataforma; limite de memória desativado")
+                return
+            if memory > self.max_memory_mb:
+                self._recycle(f"{memory:.0f} MB em uso (limite {self.max_memory_mb} MB)")
+                return
+
+    def start(self):
+        if self.max_memory_mb > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch_memory())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "max_requests": self.max_requests,
+            "resident_memory_mb": resident_memory_mb(),
+            "max_memory_mb": self.max_memory_mb,
+        }
+
+
+worker_recycler = (
+    WorkerRecycler(SERVER_MAX_REQUESTS, SERVER_MAX_REQUESTS_JITTER, WORKER_MAX_MEMORY_MB, WORKER_MEMORY_CHECK_SECONDS)
+    if WORKER_RECYCLING_ENABLED else WorkerRecycler(0, 0, 0, WORKER_MEMORY_CHECK_SECONDS)
+)
@@ -0,0 +1,280 @@
+"""Teste de carga ponta a ponta do /analyze.
+
+Sem --url, a aplicação roda no próprio processo (via ASGI, sem rede) com MODEL_BACKEND=fake, então nenhuma
+chamada ao provedor é feita. Os resultados são gravados em benchmarks/results/<commit>-<data>.json.
+
+    python -m benchmarks.LoadBenchmark --requests 200 --concurrency 16
+    python -m benchmarks.LoadBenchmark --endpoint /analyze/stream --compare benchmarks/results/<anterior>.json
+    python -m benchmarks.LoadBenchmark --url http://localhost:8000 --requests 500 --concurrency 32
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from PIL import Image
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+QUESTIONS = [
+    ("Qual é o seu tipo de pele?", ["Oleosa", "Seca", "Mista", "Normal"]),
+    ("Você tem alguma alergia conhecida?", ["Não", "Sim, a fragrâncias", "Sim, a ácidos"]),
+    ("Com que frequência você usa protetor solar?", ["Todos os dias", "Às vezes", "Nunca"]),
+    ("Você tem acne ativa?", ["Sim", "Não", "Apenas no período menstrual"]),
+    ("Qual é a sua faixa etária?", ["18 a 24", "25 a 34", "35 a 44", "45 ou mais"]),
+    ("Você sente a pele repuxar após a limpeza?", ["Sim", "Não"]),
+    ("Quantas horas dorme por noite?", ["Menos de 6", "Entre 6 e 8", "Mais de 8"]),
+    ("Você fuma?", ["Sim", "Não"]),
+]
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _jpeg(size: Tuple[int, int], rng: random.Random) -> bytes:
+    # Ruído sobre um gradiente comprime como uma foto real, ao contrário de uma cor sólida
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    base = Image.new("RGB", size, (rng.randint(120, 230), rng.randint(90, 180), rng.randint(70, 150)))
+    buffer = io.BytesIO()
+    Image.blend(base, noise, 0.3).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class PayloadFactory:
+    """Gera formulários multipart variados: quantidade e tamanho de imagens, e tamanho do questionário."""
+
+    def __init__(self, image_counts: List[int], image_sizes: List[Tuple[int, int]], question_counts: List[int],
+                 unique: bool, seed: int):
+        self.image_counts = image_counts
+        self.question_counts = question_counts
+        self.unique = unique
+        self._random = random.Random(seed)
+        # Algumas variantes por tamanho bastam; a geração das imagens não deve pesar no teste
+        self._images = {size: [_jpeg(size, self._random) for _ in range(3)] for size in image_sizes}
+
+    def build(self, index: int) -> Tuple[Dict[str, str], List[Tuple[str, Tuple[str, bytes, str]]]]:
+        questions = [
+            {"question": question, "answer": self._random.choice(answers)}
+            for question, answers in QUESTIONS[:self._random.choice(self.question_counts)]
+        ]
+        others = [{"observacao": "Pele sensível a produtos com álcool."}]
+        if self.unique:
+            # Evita que o cache e o single-flight respondam no lugar do pipeline
+            others.append({"requisicao": str(index)})
+
+        files = []
+        for i in range(self._random.choice(self.image_counts)):
+            size = self._random.choice(list(self._images))
+            files.append(("images", (f"foto-{i}.jpg", self._random.choice(self._images[size]), "image/jpeg")))
+        return {"skinData": json.dumps({"questions": questions, "others": others})}, files
+
+
+class LoadBenchmark:
+    def __init__(self, client: httpx.AsyncClient, endpoint: str, payloads: PayloadFactory):
+        self.client = client
+        self.endpoint = endpoint
+        self.payloads = payloads
+        self.latencies: List[float] = []
+        self.first_event: List[float] = []
+        self.statuses = Counter()
+
+    async def _request(self, index: int, record: bool):
+        data, files = self.payloads.build(index)
+        started = time.perf_counter()
+        first_event = None
+        status = None
+        try:
+            async with self.client.stream("POST", self.endpoint, data=data, files=files) as response:
+                status = response.status_code
+                async for chunk in response.aiter_bytes():
+                    if first_event is None:
+                        first_event = time.perf_counter() - started
+                    # O streaming responde 200 e informa a falha num evento "error"
+                    if b"event: error" in chunk:
+                        status = "sse_error"
+        except httpx.HTTPError as e:
+            status = f"exception:{type(e).__name__}"
+
+        if not record:
+            return
+        elapsed = time.perf_counter() - started
+        self.statuses[str(status)] += 1
+        if status == 200:
+            self.latencies.append(elapsed)
+            if first_event is not None:
+                self.first_event.append(first_event)
+
+    async def run(self, total: int, concurrency: int, warmup: int) -> float:
+        await asyncio.gather(*(self._request(-i - 1, record=False) for i in range(warmup)))
+
+        counter = iter(range(total))
+
+        async def worker():
+            for index in counter:
+                await self._request(index, record=True)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    def summary(self, total: int, elapsed: float) -> dict:
+        succeeded = len(self.latencies)
+        return {
+            "requests": total,
+            "succeeded": succeeded,
+            "error_rate": (total - succeeded) / total if total else 0.0,
+            "statuses": dict(self.statuses),
+            "elapsed_seconds": elapsed,
+            "throughput_rps": succeeded / elapsed if elapsed else 0.0,
+            "latency_seconds": {
+                "mean": statistics.fmean(self.latencies) if self.latencies else 0.0,
+                "p50": _percentile(self.latencies, 0.50),
+                "p95": _percentile(self.latencies, 0.95),
+                "p99": _percentile(self.latencies, 0.99),
+                "max": max(self.latencies, default=0.0),
+            },
+            "first_event_seconds": {
+                "p50": _percentile(self.first_event, 0.50),
+                "p95": _percentile(self.first_event, 0.95),
+                "p99": _percentile(self.first_event, 0.99),
+            },
+        }
+
+
+def _memory() -> dict:
+    # ru_maxrss em KiB no Linux; os filhos incluem o pool de pré-processamento de imagens
+    return {
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children_max_rss_mib": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare_rows(previous_commit: Optional[str], rows: List[Tuple[str, float, float]]):
+    print(f"\nComparação com {previous_commit}:")
+    for name, before, after in rows:
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {name:<45} {before:>12.3f} -> {after:>12.3f}  ({change})")
+
+
+def _compare(current: dict, previous: dict):
+    metrics = [
+        ("throughput_rps", lambda r: r["results"]["throughput_rps"]),
+        ("p50", lambda r: r["results"]["latency_seconds"]["p50"]),
+        ("p95", lambda r: r["results"]["latency_seconds"]["p95"]),
+        ("p99", lambda r: r["results"]["latency_seconds"]["p99"]),
+        ("error_rate", lambda r: r["results"]["error_rate"]),
+        ("max_rss_mib", lambda r: r["memory"]["max_rss_mib"]),
+    ]
+    _compare_rows(previous.get("commit"), [(name, value(previous), value(current)) for name, value in metrics])
+
+
+def _size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+async def main(args: argparse.Namespace) -> dict:
+    payloads = PayloadFactory(
+        _ints(args.images),
+        [_size(s) for s in args.image_sizes.split(",")],
+        _ints(args.questions),
+        unique=not args.allow_cache_hits,
+        seed=args.seed,
+    )
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as client:
+            benchmark = LoadBenchmark(client, args.endpoint, payloads)
+            elapsed = await benchmark.run(args.requests, args.concurrency, args.warmup)
+    else:
+        # As configurações são lidas na importação, então o ambiente precisa estar pronto antes
+        os.environ.setdefault("MODEL_BACKEND", "fake")
+        os.environ.setdefault("ANALYSIS_DISK_CACHE_PATH", "")
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+        from app.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+                benchmark = LoadBenchmark(client, args.endpoint, payloads)
+                elapsed = await benchmark.run(args.requests, args.concurrency, args.warmup)
+
+    return benchmark.summary(args.requests, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="servidor em execução; sem ele a aplicação roda no próprio processo")
+    parser.add_argument("--endpoint", default="/analyze", choices=["/analyze", "/analyze/stream"])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=4)
+    parser.add_argument("--images", default="1,1,2,3", help="quantidades de imagens sorteadas por requisição")
+    parser.add_argument("--image-sizes", default="800x600,1920x1440,4032x3024")
+    parser.add_argument("--questions", default="2,5,8", help="tamanhos de questionário sorteados")
+    parser.add_argument("--allow-cache-hits", action="store_true", help="permite payloads repetidos")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, help="resultado anterior para comparação")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    commit = _git("rev-parse", "--short", "HEAD")
+    report = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": args.url or "in-process",
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "compare", "no_save", "url")
+        },
+        "environment": {
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "model_backend": os.getenv("MODEL_BACKEND"),
+            "fake_latency_median_seconds": os.getenv("FAKE_LATENCY_MEDIAN_SECONDS"),
+        },
+        "results": results,
+        "memory": _memory(),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+
+    if not args.no_save:
+        args.output.mkdir(parents=True, exist_ok=True)
+        path = args.output / f"{commit or 'unknown'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+        print(f"\nResultado salvo em {path}")
+
+    if args.compare:
+        _compare(report, json.loads(args.compare.read_text()))
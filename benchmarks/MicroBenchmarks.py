@@ -0,0 +1,210 @@
+"""Microbenchmarks dos trechos quentes do caminho da requisição, medidos com timeit.
+
+Cada caso roda em lotes calibrados pelo timeit (autorange) e repetidos; o menor tempo por chamada é o
+número mais estável para comparar mudanças. Os resultados são gravados em benchmarks/results/micro-*.json.
+
+    python -m benchmarks.MicroBenchmarks
+    python -m benchmarks.MicroBenchmarks --filter render --compare benchmarks/results/micro-<anterior>.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# As configurações são lidas na importação da aplicação
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("ANALYSIS_DISK_CACHE_PATH", "")
+
+from fastapi import Request, UploadFile
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from starlette.datastructures import Headers
+
+from app.catalog.ProductCatalog import product_catalog
+from app.config.Settings import CATALOG_PATH
+from app.images.ImageServices import ingest_images, preprocess_images, shutdown_image_pool
+from app.main import app, get_skin_profile, process_images, pydantic_validation_exception_handler, render_analysis
+from app.models.Request import SkinProfileRequest
+from app.models.Response import AnalysisOutput, AnalysisResponse
+from benchmarks.LoadBenchmark import QUESTIONS, RESULTS_DIR, _compare_rows, _git, _jpeg
+
+_loop = asyncio.new_event_loop()
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Registra um caso; a função decorada faz o preparo e devolve o callable medido."""
+    def register(setup: Callable[[], Callable[[], object]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _run(coroutine_fn: Callable[[], object]) -> Callable[[], object]:
+    return lambda: _loop.run_until_complete(coroutine_fn())
+
+
+def _request() -> Request:
+    request = Request({"type": "http", "method": "POST", "path": "/analyze", "headers": [], "query_string": b""})
+    request.state.received_at = 0.0
+    return request
+
+
+def _skin_data(questions: int, others: int) -> str:
+    return json.dumps({
+        "questions": [
+            {"question": question, "answer": answers[0]}
+            for question, answers in (QUESTIONS * 4)[:questions]
+        ],
+        "others": [{"observacao": f"Observação {i} sobre a pele do paciente."} for i in range(others)],
+    })
+
+
+def _output(products_per_period: int) -> AnalysisOutput:
+    ids = [product.id for product in product_catalog.search(limit=len(product_catalog))]
+    routine = [ids[i % len(ids)] for i in range(products_per_period)]
+    return AnalysisOutput.model_validate({
+        "scores": [{"score_tag": f"indicador {i}", "score_number": 10 * i} for i in range(8)],
+        "concerns": "Pele oleosa com tendência acneica, comedões na zona T e marcas pós-inflamatórias discretas.",
+        "skin_type": "oleosa",
+        "routine": {"morning": routine, "night": routine},
+    })
+
+
+def _uploads(images: List[bytes]) -> List[UploadFile]:
+    return [
+        UploadFile(io.BytesIO(data), size=len(data), filename=f"foto-{i}.jpg",
+                   headers=Headers({"content-type": "image/jpeg"}))
+        for i, data in enumerate(images)
+    ]
+
+
+for _questions, _others, _label in ((2, 1, "small"), (32, 20, "large")):
+    @benchmark(f"get_skin_profile[{_label}]")
+    def _(questions=_questions, others=_others):
+        request, skin_data = _request(), _skin_data(questions, others)
+        return lambda: get_skin_profile(request, skin_data)
+
+
+for _count, _size, _label in ((1, (800, 600), "1x800x600"), (1, (4032, 3024), "1x4032x3024"),
+                              (3, (4032, 3024), "3x4032x3024")):
+    @benchmark(f"process_images[{_label}]")
+    def _(count=_count, size=_size):
+        images = [_jpeg(size, random.Random(i)) for i in range(count)]
+        return _run(lambda: process_images(_uploads(images)))
+
+    @benchmark(f"preprocess_images[{_label}]")
+    def _(count=_count, size=_size):
+        images = _loop.run_until_complete(ingest_images(_uploads([_jpeg(size, random.Random(i)) for i in range(count)])))
+        # Sobe o pool de processos fora da medição
+        _loop.run_until_complete(preprocess_images(images))
+        return _run(lambda: preprocess_images(images))
+
+
+for _products, _label in ((2, "small"), (40, "large")):
+    @benchmark(f"AnalysisResponse.model_validate[{_label}]")
+    def _(products=_products):
+        data = product_catalog.hydrate(_output(products)).model_dump(mode="json")
+        return lambda: AnalysisResponse.model_validate(data)
+
+    @benchmark(f"hydrate[{_label}]")
+    def _(products=_products):
+        output = _output(products)
+        return lambda: product_catalog.hydrate(output)
+
+    @benchmark(f"render_response_model[{_label}]")
+    def _(products=_products):
+        from fastapi.routing import serialize_response
+
+        route = next(r for r in app.routes if getattr(r, "path", None) == "/analyze" and "POST" in r.methods)
+        response = product_catalog.hydrate(_output(products))
+
+        # O que o FastAPI faz quando a rota devolve o modelo: valida contra o response_model, serializa e renderiza
+        async def render():
+            content = await serialize_response(field=route.response_field, response_content=response)
+            return JSONResponse(content)
+
+        return _run(render)
+
+    @benchmark(f"render_analysis[{_label}]")
+    def _(products=_products):
+        response = product_catalog.hydrate(_output(products))
+        return lambda: render_analysis(response)
+
+
+@benchmark("validation_error_handler")
+def _():
+    request = _request()
+    try:
+        SkinProfileRequest.model_validate_json(json.dumps({
+            "questions": [{"question": question} for question, _ in QUESTIONS * 3],
+            "others": [{"observacao": i} for i in range(10)],
+        }))
+    except ValidationError as e:
+        exc = e
+    return _run(lambda: pydantic_validation_exception_handler(request, exc))
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "best_us": min(per_call) * 1e6,
+        "median_us": statistics.median(per_call) * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="roda apenas os casos cujo nome contém o texto")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, help="resultado anterior para comparação")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    product_catalog.load(CATALOG_PATH)
+    results = {}
+    try:
+        for name, setup in BENCHMARKS.items():
+            if args.filter not in name:
+                continue
+            results[name] = measure(setup(), args.repeat)
+            print(f"{name:<45} {results[name]['best_us']:>12.1f} µs  (mediana {results[name]['median_us']:.1f} µs)")
+    finally:
+        shutdown_image_pool()
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    report = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+    if not args.no_save:
+        args.output.mkdir(parents=True, exist_ok=True)
+        path = args.output / f"micro-{commit or 'unknown'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\nResultado salvo em {path}")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        _compare_rows(
+            previous.get("commit"),
+            [
+                (name, previous["results"][name]["best_us"], result["best_us"])
+                for name, result in results.items() if name in previous["results"]
+            ]
+        )
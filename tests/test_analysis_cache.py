@@ -0,0 +1,77 @@
+import time
+import unittest
+from unittest import mock
+
+from pydantic_ai import BinaryContent
+
+from app.cache.AnalysisCache import AnalysisCache, analysis_key
+from app.models.Request import AIRequest, SkinProfileRequest
+from app.models.Response import AnalysisOutput
+
+
+def _output(concerns: str = "Pele oleosa") -> AnalysisOutput:
+    return AnalysisOutput.model_validate({
+        "scores": [{"score_tag": "acne", "score_number": 40}],
+        "concerns": concerns,
+        "skin_type": "oleosa",
+        "routine": {"morning": ["dmg-001"], "night": ["dmg-002"]},
+    })
+
+
+def _request(image: bytes = b"imagem", answer: str = "sim") -> AIRequest:
+    return AIRequest(
+        skin_profile=SkinProfileRequest.model_validate(
+            {"questions": [{"question": "Tem acne?", "answer": answer}], "others": []}
+        ),
+        images=[BinaryContent(data=image, media_type="image/jpeg")],
+    )
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    def test_evicts_the_least_recently_used_entry(self):
+        cache = AnalysisCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", _output("a"))
+        cache.set("b", _output("b"))
+        cache.get("a")
+        cache.set("c", _output("c"))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a").concerns, "a")
+        self.assertEqual(cache.get("c").concerns, "c")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_misses(self):
+        cache = AnalysisCache(max_entries=2, ttl_seconds=0.01)
+        cache.set("a", _output())
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_disabled_with_zero_entries(self):
+        cache = AnalysisCache(max_entries=0, ttl_seconds=60)
+        cache.set("a", _output())
+        self.assertIsNone(cache.get("a"))
+
+
+class AnalysisKeyTest(unittest.TestCase):
+    def test_same_request_same_key(self):
+        self.assertEqual(analysis_key(_request()), analysis_key(_request()))
+
+    def test_images_and_profile_change_the_key(self):
+        key = analysis_key(_request())
+        self.assertNotEqual(analysis_key(_request(image=b"outra imagem")), key)
+        self.assertNotEqual(analysis_key(_request(answer="não")), key)
+
+    def test_preprocessing_config_changes_the_key(self):
+        key = analysis_key(_request())
+        for name, value in [
+            ("IMAGE_PREPROCESS_ENABLED", False),
+            ("IMAGE_MAX_EDGE", 512),
+            ("IMAGE_OUTPUT_FORMAT", "WEBP"),
+            ("IMAGE_QUALITY", 60),
+            ("ANALYSIS_CACHE_NAMESPACE", "outro"),
+        ]:
+            with self.subTest(setting=name), mock.patch(f"app.cache.AnalysisCache.{name}", value):
+                self.assertNotEqual(analysis_key(_request()), key)
@@ -0,0 +1,56 @@
+import unittest
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.limits.BodySizeLimit import BodySizeLimitMiddleware
+
+MAX_BYTES = 1024
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze(image: UploadFile = File(...)):
+        return {"size": len(await image.read())}
+
+    @app.post("/outro")
+    async def other(image: UploadFile = File(...)):
+        return {"size": len(await image.read())}
+
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BYTES, paths=["/analyze"])
+    return TestClient(app)
+
+
+def _chunks(total: int, size: int = 256):
+    for start in range(0, total, size):
+        yield b"x" * min(size, total - start)
+
+
+class BodySizeLimitMiddlewareTest(unittest.TestCase):
+    def setUp(self):
+        self.client = _client()
+
+    def test_small_body_passes(self):
+        response = self.client.post("/analyze", files={"image": ("a.jpg", b"x" * 100, "image/jpeg")})
+        self.assertEqual(response.json(), {"size": 100})
+
+    def test_content_length_over_the_limit(self):
+        response = self.client.post("/analyze", files={"image": ("a.jpg", b"x" * MAX_BYTES, "image/jpeg")})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn(str(MAX_BYTES), response.json()["detail"])
+
+    def test_chunked_body_over_the_limit(self):
+        response = self.client.post(
+            "/analyze",
+            content=_chunks(4 * MAX_BYTES),
+            headers={"Content-Type": "multipart/form-data; boundary=limite"},
+        )
+        self.assertNotIn("content-length", response.request.headers)
+        self.assertEqual(response.request.headers["transfer-encoding"], "chunked")
+        self.assertEqual(response.status_code, 413)
+
+    def test_other_paths_are_not_limited(self):
+        response = self.client.post("/outro", files={"image": ("a.jpg", b"x" * 2 * MAX_BYTES, "image/jpeg")})
+        self.assertEqual(response.json(), {"size": 2 * MAX_BYTES})
@@ -0,0 +1,148 @@
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+from pydantic_ai.exceptions import ModelAPIError, ModelHTTPError, UnexpectedModelBehavior
+
+from app.ai.CircuitBreaker import CircuitBreaker, CircuitState
+
+OPEN_SECONDS = 0.05
+
+
+def _breaker(half_open_probes: int = 1) -> CircuitBreaker:
+    return CircuitBreaker(
+        window_size=4,
+        min_calls=2,
+        failure_rate=0.5,
+        slow_call_seconds=10,
+        slow_call_rate=1.0,
+        open_seconds=OPEN_SECONDS,
+        half_open_probes=half_open_probes,
+    )
+
+
+async def _fail(breaker: CircuitBreaker):
+    try:
+        async with breaker.guard():
+            raise ModelHTTPError(503, "fake")
+    except ModelHTTPError:
+        pass
+
+
+async def _succeed(breaker: CircuitBreaker):
+    async with breaker.guard():
+        pass
+
+
+class CircuitBreakerTest(unittest.IsolatedAsyncioTestCase):
+    async def _open(self, breaker: CircuitBreaker):
+        await _fail(breaker)
+        await _fail(breaker)
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+    async def test_opens_and_rejects_with_retry_after(self):
+        breaker = _breaker()
+        await self._open(breaker)
+
+        with self.assertRaises(HTTPException) as rejected:
+            await _succeed(breaker)
+        self.assertEqual(rejected.exception.status_code, 503)
+        self.assertEqual(rejected.exception.headers["Retry-After"], "1")
+        self.assertEqual(breaker.stats()["rejected"], 1)
+
+    async def test_half_open_probe_success_closes(self):
+        breaker = _breaker()
+        await self._open(breaker)
+        await asyncio.sleep(OPEN_SECONDS)
+
+        await _succeed(breaker)
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertEqual(breaker.stats()["window_calls"], 0)
+
+    async def test_half_open_probe_failure_reopens(self):
+        breaker = _breaker()
+        await self._open(breaker)
+        await asyncio.sleep(OPEN_SECONDS)
+
+        await _fail(breaker)
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertEqual(breaker.times_opened, 2)
+
+    async def test_half_open_admits_only_the_probes(self):
+        breaker = _breaker(half_open_probes=1)
+        await self._open(breaker)
+        await asyncio.sleep(OPEN_SECONDS)
+
+        probe_started = asyncio.Event()
+        finish_probe = asyncio.Event()
+
+        async def probe():
+            async with breaker.guard():
+                probe_started.set()
+                await finish_probe.wait()
+
+        task = asyncio.create_task(probe())
+        await probe_started.wait()
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        with self.assertRaises(HTTPException):
+            await _succeed(breaker)
+
+        finish_probe.set()
+        await task
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+    async def test_cancelled_probe_frees_its_place(self):
+        breaker = _breaker(half_open_probes=1)
+        await self._open(breaker)
+        await asyncio.sleep(OPEN_SECONDS)
+
+        async def probe():
+            async with breaker.guard():
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(probe())
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        # O cancelamento não conta como resultado: outra chamada de teste pode fechar o circuito
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        await _succeed(breaker)
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+    async def test_http_exceptions_are_not_provider_failures(self):
+        breaker = _breaker()
+        for _ in range(3):
+            with self.assertRaises(HTTPException):
+                async with breaker.guard():
+                    raise HTTPException(status_code=503)
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertEqual(breaker.stats()["window_calls"], 0)
+
+    async def test_connection_errors_and_timeouts_are_failures(self):
+        breaker = _breaker()
+        for error in (ModelAPIError("fake", "conexão recusada"), asyncio.TimeoutError()):
+            with self.assertRaises(type(error)):
+                async with breaker.guard():
+                    raise error
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+    async def test_invalid_model_output_is_not_a_provider_failure(self):
+        breaker = _breaker()
+        for _ in range(3):
+            with self.assertRaises(UnexpectedModelBehavior):
+                async with breaker.guard():
+                    raise UnexpectedModelBehavior("Output validation failed during streaming")
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertEqual(breaker.stats()["failure_rate"], 0.0)
+
+    async def test_invalid_output_from_a_probe_closes_the_circuit(self):
+        breaker = _breaker()
+        await self._open(breaker)
+        await asyncio.sleep(OPEN_SECONDS)
+
+        with self.assertRaises(UnexpectedModelBehavior):
+            async with breaker.guard():
+                raise UnexpectedModelBehavior("saída inválida")
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+import zlib
+from unittest import mock
+
+from app.cache import DiskCache
+from app.cache.DiskCache import DiskAnalysisCache
+from tests.test_analysis_cache import _output
+
+
+def _size(concerns: str) -> int:
+    return len(zlib.compress(_output(concerns).model_dump_json().encode(), 6))
+
+
+class DiskAnalysisCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Subdiretório ainda inexistente: o cache cria
+        self.path = os.path.join(directory.name, "cache", "analyses.sqlite3")
+
+    def _cache(self, max_bytes: int = 1_000_000, ttl_seconds: float = 60) -> DiskAnalysisCache:
+        cache = DiskAnalysisCache(self.path, max_bytes, ttl_seconds)
+        self.addCleanup(cache.close)
+        return cache
+
+    def _column(self, query: str, *args):
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(query, args).fetchone()[0]
+
+    async def test_round_trip_survives_a_new_instance(self):
+        first = DiskAnalysisCache(self.path, 1_000_000, 60)
+        await first.set("a", _output("persistida"))
+        first.close()
+
+        cached = await self._cache().get("a")
+        self.assertEqual(cached, _output("persistida"))
+
+    async def test_miss_and_expiry(self):
+        cache = self._cache(ttl_seconds=0.01)
+        self.assertIsNone(await cache.get("a"))
+        await cache.set("a", _output())
+        time.sleep(0.02)
+
+        self.assertIsNone(await cache.get("a"))
+        self.assertEqual(cache.stats()["misses"], 2)
+        self.assertEqual(self._column("SELECT COUNT(*) FROM analyses"), 0)
+
+    async def test_evicts_least_recently_accessed_down_to_max_bytes(self):
+        cache = self._cache(max_bytes=_size("a") + _size("c"))
+        with mock.patch.object(DiskCache, "ACCESS_UPDATE_SECONDS", 0):
+            await cache.set("a", _output("a"))
+            await cache.set("b", _output("b"))
+            await cache.get("a")
+            await cache.set("c", _output("c"))
+
+            self.assertIsNone(await cache.get("b"))
+            self.assertIsNotNone(await cache.get("a"))
+            self.assertIsNotNone(await cache.get("c"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    async def test_size_total_is_kept_by_the_database(self):
+        cache = self._cache()
+        other = self._cache()
+        await cache.set("a", _output("a"))
+        await other.set("b", _output("b"))
+        await cache.set("a", _output("a com outro texto, maior"))
+
+        expected = self._column("SELECT SUM(size) FROM analyses")
+        self.assertEqual(self._column("SELECT total FROM analyses_size"), expected)
+        self.assertEqual(expected, _size("a com outro texto, maior") + _size("b"))
+
+    async def test_hits_only_refresh_old_access_times(self):
+        cache = self._cache()
+        await cache.set("a", _output())
+        accessed_at = self._column("SELECT accessed_at FROM analyses")
+
+        await cache.get("a")
+        self.assertEqual(self._column("SELECT accessed_at FROM analyses"), accessed_at)
+        with mock.patch.object(DiskCache, "ACCESS_UPDATE_SECONDS", 0):
+            await cache.get("a")
+        self.assertGreater(self._column("SELECT accessed_at FROM analyses"), accessed_at)
@@ -0,0 +1,28 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics.Metrics import HTTP_RESPONSES
+
+
+def _count(method: str, route: str, status: int) -> float:
+    return HTTP_RESPONSES.labels(method, route, str(status))._value.get()
+
+
+class HttpMetricsTest(unittest.TestCase):
+    def test_rejections_before_routing_keep_the_route_template(self):
+        client = TestClient(app)
+        before = _count("POST", "/analyze", 413), _count("GET", "unmatched", 404)
+
+        # Content-Length declarado acima do limite: o middleware responde 413 sem chegar ao roteador
+        response = client.post(
+            "/analyze",
+            content=b"x",
+            headers={"Content-Length": str(10 ** 12), "Content-Type": "multipart/form-data; boundary=a"},
+        )
+        self.assertEqual(response.status_code, 413)
+        client.get("/inexistente")
+
+        self.assertEqual(_count("POST", "/analyze", 413), before[0] + 1)
+        self.assertEqual(_count("GET", "unmatched", 404), before[1] + 1)
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from fastapi import HTTPException
+
+from app.jobs.JobStore import JobStore
+from app.models.Response import JobStatus
+
+
+class JobStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def test_lifecycle_until_done(self):
+        store = JobStore(max_pending=2, ttl_seconds=60)
+        release = asyncio.Event()
+
+        async def analysis():
+            await release.wait()
+
+        job = store.submit(analysis)
+        self.assertEqual(job.status, JobStatus.PENDING)
+        await asyncio.sleep(0)
+        self.assertEqual((await store.get(job.job_id)).status, JobStatus.RUNNING)
+
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        done = await store.get(job.job_id)
+        self.assertEqual(done.status, JobStatus.DONE)
+        self.assertIsNotNone(done.finished_at)
+        self.assertEqual(store.stats()["pending"], 0)
+
+    async def test_failures_are_recorded_on_the_job(self):
+        store = JobStore(max_pending=2, ttl_seconds=60)
+
+        async def rejected():
+            raise HTTPException(status_code=503, detail="Serviço sobrecarregado.")
+
+        async def broken():
+            raise RuntimeError("bug")
+
+        first, second = store.submit(rejected), store.submit(broken)
+        await asyncio.sleep(0.01)
+        failed = await store.get(first.job_id)
+        self.assertEqual((failed.status, failed.error), (JobStatus.FAILED, "Serviço sobrecarregado."))
+        self.assertEqual((await store.get(second.job_id)).error, "Erro ao processar a análise.")
+
+    async def test_rejects_beyond_max_pending(self):
+        store = JobStore(max_pending=1, ttl_seconds=60)
+        release = asyncio.Event()
+        store.submit(release.wait)
+
+        with self.assertRaises(HTTPException) as rejected:
+            store.submit(release.wait)
+        self.assertEqual(rejected.exception.status_code, 503)
+        release.set()
+        await store.shutdown(grace_seconds=1)
+
+    async def test_finished_jobs_expire(self):
+        store = JobStore(max_pending=1, ttl_seconds=0.01)
+
+        async def analysis():
+            return None
+
+        job = store.submit(analysis)
+        await asyncio.sleep(0.02)
+        self.assertIsNone(await store.get(job.job_id))
+
+    async def test_shutdown_cancels_jobs_after_the_grace_period(self):
+        store = JobStore(max_pending=1, ttl_seconds=60)
+        job = store.submit(asyncio.Event().wait)
+        await asyncio.sleep(0)
+
+        await store.shutdown(grace_seconds=0.01)
+        cancelled = await store.get(job.job_id)
+        self.assertEqual(cancelled.status, JobStatus.FAILED)
+        self.assertIn("encerramento", cancelled.error)
+
+    async def test_jobs_are_visible_to_other_workers_through_sqlite(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "jobs.sqlite3")
+        worker, other_worker = JobStore(2, 60, path), JobStore(2, 60, path)
+
+        async def analysis():
+            raise RuntimeError("bug")
+
+        job = worker.submit(analysis)
+        await asyncio.sleep(0.01)
+        await worker.shutdown()
+
+        shared = await other_worker.get(job.job_id)
+        self.assertEqual(shared.status, JobStatus.FAILED)
+        self.assertIsNone(await other_worker.get("inexistente"))
+        await other_worker.shutdown()
@@ -0,0 +1,99 @@
+import unittest
+
+from fastapi import HTTPException
+
+from app.ai.ModelRouter import ModelRouter, check_analysis
+from app.models.Request import SkinProfileRequest
+from app.models.Response import AnalysisOutput
+from tests.test_analysis_cache import _request
+
+CONCERNS = "Pele oleosa com poros dilatados e acne leve na zona T."
+
+
+def _output(**changes) -> AnalysisOutput:
+    data = {
+        "scores": [
+            {"score_tag": "acne", "score_number": 40},
+            {"score_tag": "oleosidade", "score_number": 70},
+            {"score_tag": "poros", "score_number": 55},
+        ],
+        "concerns": CONCERNS,
+        "skin_type": "oleosa",
+        "routine": {"morning": ["dmg-001"], "night": ["dmg-002"]},
+    }
+    data.update(changes)
+    return AnalysisOutput.model_validate(data)
+
+
+def _profile(skin_type: str = None) -> SkinProfileRequest:
+    questions = [{"question": "Qual é o seu tipo de pele?", "answer": f"Pele {skin_type}"}] if skin_type else []
+    return SkinProfileRequest.model_validate({"questions": questions, "others": []})
+
+
+class CheckAnalysisTest(unittest.TestCase):
+    def test_consistent_output_passes(self):
+        self.assertEqual(check_analysis(_output(), _profile("oleosa")), [])
+
+    def test_each_rule_escalates(self):
+        scores = _output().model_dump()["scores"]
+        cases = {
+            "poucos_scores": _output(scores=scores[:2]),
+            "score_fora_do_intervalo": _output(scores=scores[:2] + [{"score_tag": "poros", "score_number": 130}]),
+            "scores_duplicados": _output(scores=scores[:2] + [{"score_tag": "Acne", "score_number": 10}]),
+            "concerns_curto": _output(concerns="Oleosa."),
+            "rotina_incompleta": _output(routine={"morning": ["dmg-001"], "night": []}),
+        }
+        for problem, output in cases.items():
+            with self.subTest(problem=problem):
+                self.assertEqual(check_analysis(output, _profile()), [problem])
+
+    def test_declared_skin_type_must_match(self):
+        self.assertEqual(check_analysis(_output(), _profile("seca")), ["tipo_de_pele_divergente"])
+        # Sem tipo declarado não há o que comparar
+        self.assertEqual(check_analysis(_output(), _profile()), [])
+
+
+class ModelRouterTest(unittest.IsolatedAsyncioTestCase):
+    def _router(self, fast_output=None, fast_error: Exception = None, enabled: bool = True) -> ModelRouter:
+        self.calls = []
+
+        async def run(ai_request, model):
+            self.calls.append(model)
+            if model == "fast" and fast_error is not None:
+                raise fast_error
+            return fast_output if model == "fast" else _output(concerns=CONCERNS + " (pro)")
+
+        return ModelRouter(run, "fast", "pro", enabled=enabled)
+
+    async def test_good_fast_output_is_kept(self):
+        router = self._router(fast_output=_output())
+        self.assertEqual(await router.run(_request()), _output())
+        self.assertEqual(self.calls, ["fast"])
+        self.assertEqual(router.stats()["escalation_rate"], 0.0)
+
+    async def test_failed_rules_escalate_to_pro(self):
+        router = self._router(fast_output=_output(concerns="Oleosa."))
+        output = await router.run(_request())
+
+        self.assertTrue(output.concerns.endswith("(pro)"))
+        self.assertEqual(self.calls, ["fast", "pro"])
+        self.assertEqual(router.stats()["escalation_reasons"], {"concerns_curto": 1})
+
+    async def test_fast_model_error_escalates(self):
+        router = self._router(fast_error=RuntimeError("timeout"))
+        await router.run(_request())
+
+        self.assertEqual(self.calls, ["fast", "pro"])
+        self.assertEqual(router.fast.errors, 1)
+        self.assertEqual(router.stats()["escalation_reasons"], {"erro_modelo_rapido": 1})
+
+    async def test_scheduler_rejection_does_not_escalate(self):
+        router = self._router(fast_error=HTTPException(status_code=503, detail="Serviço sobrecarregado."))
+        with self.assertRaises(HTTPException):
+            await router.run(_request())
+        self.assertEqual(self.calls, ["fast"])
+
+    async def test_disabled_goes_straight_to_pro(self):
+        router = self._router(fast_output=_output(), enabled=False)
+        await router.run(_request())
+        self.assertEqual(self.calls, ["pro"])
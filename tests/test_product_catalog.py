@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.catalog.ProductCatalog import ProductCatalog
+from app.models.Response import SkinTypes
+from tests.test_analysis_cache import _output
+
+
+def _product(product_id: str, category: str, price: float, skin_types: list, concerns: list) -> dict:
+    return {
+        "id": product_id,
+        "title": f"Produto {product_id}",
+        "description": "",
+        "price": price,
+        "image_url": "",
+        "link": "",
+        "category": category,
+        "skin_types": skin_types,
+        "concerns": concerns,
+    }
+
+
+PRODUCTS = [
+    _product("dmg-001", "Limpeza", 79.9, ["oleosa", "mista"], ["acne", "Oleosidade"]),
+    _product("dmg-002", "tratamento", 129.0, ["oleosa"], ["acne"]),
+    _product("dmg-003", "hidratação", 99.0, ["seca"], ["ressecamento"]),
+    _product("dmg-004", "limpeza", 59.0, ["seca", "normal"], ["sensibilidade"]),
+]
+
+
+class ProductCatalogTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "catalog.json")
+        with open(path, "w") as file:
+            json.dump(PRODUCTS, file)
+        self.catalog = ProductCatalog()
+        self.catalog.load(path)
+
+    def _ids(self, **filters) -> list:
+        return [product.id for product in self.catalog.search(**filters)]
+
+    def test_search_intersects_filters_ordered_by_price(self):
+        self.assertEqual(self._ids(category="limpeza"), ["dmg-004", "dmg-001"])
+        self.assertEqual(self._ids(skin_type=SkinTypes.OLEOSA, concern="acne"), ["dmg-001", "dmg-002"])
+        self.assertEqual(self._ids(category="limpeza", skin_type=SkinTypes.OLEOSA), ["dmg-001"])
+        self.assertEqual(self._ids(category="maquiagem"), [])
+
+    def test_search_terms_ignore_case_and_accents(self):
+        self.assertEqual(self._ids(category="HIDRATACAO"), ["dmg-003"])
+        self.assertEqual(self._ids(concern="oleosidade"), ["dmg-001"])
+
+    def test_search_price_cap_and_limit(self):
+        self.assertEqual(self._ids(max_price=99.0), ["dmg-004", "dmg-001", "dmg-003"])
+        self.assertEqual(self._ids(max_price=99.0, limit=2), ["dmg-004", "dmg-001"])
+        self.assertEqual(self._ids(concern="acne", max_price=100), ["dmg-001"])
+        self.assertEqual(self._ids(max_price=10), [])
+
+    def test_unknown_ids(self):
+        self.assertEqual(self.catalog.unknown_ids(["dmg-001", "dmg-999", "dmg-002", "x"]), ["dmg-999", "x"])
+        self.assertEqual(self.catalog.unknown_ids([]), [])
+
+    def test_hydrate_replaces_ids_with_products(self):
+        response = self.catalog.hydrate(_output())
+
+        self.assertEqual([product.title for product in response.routine.morning], ["Produto dmg-001"])
+        self.assertEqual([product.price for product in response.routine.night], [129.0])
+        self.assertEqual((response.concerns, response.skin_type), ("Pele oleosa", SkinTypes.OLEOSA))
+
+    def test_missing_file_leaves_an_empty_catalog(self):
+        self.catalog.load(os.path.join(tempfile.gettempdir(), "inexistente.json"))
+        self.assertEqual(len(self.catalog), 0)
+        self.assertEqual(self._ids(), [])
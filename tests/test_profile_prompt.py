@@ -0,0 +1,54 @@
+import unittest
+
+from app.ai.ProfilePrompt import CHARS_PER_TOKEN, estimate_tokens, render_profile
+from app.models.Request import SkinProfileRequest
+
+
+def _profile(questions=(), others=()) -> SkinProfileRequest:
+    return SkinProfileRequest.model_validate({
+        "questions": [{"question": question, "answer": answer} for question, answer in questions],
+        "others": list(others),
+    })
+
+
+class RenderProfileTest(unittest.TestCase):
+    def test_normalizes_and_deduplicates(self):
+        profile = _profile(
+            questions=[("Tem  acne?", "sim"), ("Usa protetor?", "  "), ("TEM ACNE?", "às vezes\n")],
+            others=[{"alergia": "nenhuma"}, {"Alergia": "Nenhuma"}],
+        )
+
+        self.assertEqual(render_profile(profile, max_tokens=800, max_value_chars=300), "\n".join([
+            "Questionário do paciente (pergunta: resposta):",
+            "- Tem acne?: às vezes",
+            "Outras informações do paciente:",
+            "- alergia: nenhuma",
+        ]))
+
+    def test_empty_questionnaire(self):
+        text = render_profile(_profile(), max_tokens=800, max_value_chars=300)
+        self.assertEqual(text.splitlines()[1], "- (não respondido)")
+
+    def test_long_values_are_cut(self):
+        text = render_profile(_profile(questions=[("Rotina", "x" * 50)]), max_tokens=800, max_value_chars=10)
+        self.assertIn("- Rotina: xxxxxxxxx…", text)
+
+    def test_others_stop_at_the_token_budget(self):
+        profile = _profile(
+            questions=[("Tem acne?", "sim")],
+            others=[{f"nota {i}": "y" * 40} for i in range(20)],
+        )
+        text = render_profile(profile, max_tokens=60, max_value_chars=300)
+
+        self.assertLessEqual(estimate_tokens(text), 60)
+        # O questionário entra inteiro; as observações que não cabem são contadas, não descartadas em silêncio
+        self.assertIn("- Tem acne?: sim", text)
+        self.assertIn("- nota 0: ", text)
+        self.assertRegex(text.splitlines()[-1], r"^- \(\+\d+ informação\(ões\) omitida\(s\)")
+
+    def test_questionnaire_over_the_budget_is_truncated(self):
+        profile = _profile(questions=[(f"Pergunta {i}", "z" * 100) for i in range(20)])
+        text = render_profile(profile, max_tokens=50, max_value_chars=300)
+
+        self.assertLessEqual(len(text), 50 * CHARS_PER_TOKEN)
+        self.assertTrue(text.endswith("…"))
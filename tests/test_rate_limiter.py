@@ -0,0 +1,102 @@
+import re
+import time
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from app.limits.RateLimiter import (
+    MemoryBucketStore, RateLimitMiddleware, RateLimitRule, RateLimiter, client_key,
+)
+
+RULE = RateLimitRule("analyze", "POST", re.compile(r"/analyze"), per_minute=60, burst=2)
+SCOPE = {"type": "http", "client": ("10.0.0.1", 5000)}
+
+
+class BrokenStore:
+    async def take(self, key, rule):
+        raise ConnectionError("redis fora do ar")
+
+    async def close(self):
+        pass
+
+
+class MemoryBucketStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_then_rejects_with_retry_after(self):
+        store = MemoryBucketStore(max_keys=10)
+        self.assertTrue((await store.take("a", RULE)).allowed)
+        self.assertTrue((await store.take("a", RULE)).allowed)
+
+        decision = await store.take("a", RULE)
+        self.assertFalse(decision.allowed)
+        self.assertAlmostEqual(decision.retry_after, 1, places=1)
+
+    async def test_refills_up_to_the_burst(self):
+        store = MemoryBucketStore(max_keys=10)
+        # Bucket vazio há 30 s: a 1 ficha/s voltaria a 30, mas não passa da rajada
+        store._buckets["a"] = (0, time.monotonic() - 30)
+
+        decision = await store.take("a", RULE)
+        self.assertTrue(decision.allowed)
+        self.assertAlmostEqual(decision.remaining, RULE.burst - 1, places=2)
+
+    async def test_evicts_the_least_recently_used_key(self):
+        store = MemoryBucketStore(max_keys=2)
+        await store.take("a", RULE)
+        await store.take("b", RULE)
+        await store.take("a", RULE)
+        await store.take("c", RULE)
+
+        self.assertEqual(list(store._buckets), ["a", "c"])
+
+
+class RateLimiterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_broken_store_falls_back_to_local_buckets(self):
+        limiter = RateLimiter([RULE], store=BrokenStore(), fallback_seconds=60)
+
+        decisions = [await limiter.take("ip:10.0.0.1", RULE) for _ in range(3)]
+        self.assertEqual([decision.allowed for decision in decisions], [True, True, False])
+        # Só a primeira chamada tenta o backend; as seguintes vão direto aos buckets locais
+        self.assertEqual(limiter.store_errors, 1)
+        self.assertEqual(limiter.rejected["analyze"], 1)
+
+    def test_match(self):
+        limiter = RateLimiter([RULE])
+        self.assertIs(limiter.match("POST", "/analyze"), RULE)
+        self.assertIsNone(limiter.match("GET", "/analyze"))
+        self.assertIsNone(limiter.match("POST", "/analyze/extra"))
+
+
+class ClientKeyTest(unittest.TestCase):
+    def test_only_issued_api_keys_get_their_own_bucket(self):
+        limiter = RateLimiter([RULE], api_keys=["emitida"])
+
+        issued = client_key(Headers({"x-api-key": "emitida"}), SCOPE, limiter.api_keys)
+        self.assertTrue(issued.startswith("key:"))
+        self.assertNotIn("emitida", issued)
+        self.assertEqual(client_key(Headers({"x-api-key": "inventada"}), SCOPE, limiter.api_keys), "ip:10.0.0.1")
+
+    def test_client_headers_do_not_change_the_key(self):
+        headers = Headers({"x-user-id": "outro-usuario"})
+        self.assertEqual(client_key(headers, SCOPE), "ip:10.0.0.1")
+
+
+class RateLimitMiddlewareTest(unittest.TestCase):
+    def test_rejects_with_429_and_rate_limit_headers(self):
+        app = FastAPI()
+
+        @app.post("/analyze")
+        async def analyze():
+            return {"ok": True}
+
+        app.add_middleware(RateLimitMiddleware, limiter=RateLimiter([RULE]))
+        client = TestClient(app)
+
+        statuses = [client.post("/analyze", headers={"X-User-Id": str(i)}).status_code for i in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+        response = client.post("/analyze")
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertEqual(response.headers["RateLimit-Limit"], "2")
+        self.assertEqual(response.headers["RateLimit-Remaining"], "0")
@@ -0,0 +1,191 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fastapi import HTTPException
+from pydantic_ai.exceptions import ModelAPIError, ModelHTTPError, UnexpectedModelBehavior
+
+from app.ai.RetryPolicy import FATAL, RATE_LIMIT, TRANSPORT, VALIDATION, RetryPolicy, classify_error
+
+MODEL = "google:fake"
+
+
+def _policy() -> RetryPolicy:
+    policy = RetryPolicy(
+        max_attempts=1,
+        base_delay=0,
+        max_delay=0,
+        max_retry_after=0,
+        validation_attempts=0,
+        hedge_percentile=0.5,
+        hedge_min_samples=1,
+    )
+    # Histórico de latência que dispara o hedge após 20 ms
+    policy._latencies[MODEL].append(0.02)
+    return policy
+
+
+def _retrying_policy(max_attempts: int = 3, validation_attempts: int = 1) -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=max_attempts,
+        base_delay=0,
+        max_delay=0,
+        max_retry_after=0,
+        validation_attempts=validation_attempts,
+    )
+
+
+def _calls(*behaviours):
+    """Cada chamada segue o próximo comportamento: (segundos de espera, resultado ou exceção)."""
+    started = []
+
+    async def fn():
+        index = len(started)
+        delay, outcome = behaviours[index]
+        started.append(index)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            started[index] = f"cancelled-{index}"
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return fn, started
+
+
+class ClassifyErrorTest(unittest.TestCase):
+    def test_kinds(self):
+        cases = [
+            (ModelHTTPError(429, MODEL), RATE_LIMIT),
+            (ModelHTTPError(503, MODEL), TRANSPORT),
+            (ModelHTTPError(500, MODEL), TRANSPORT),
+            (ModelHTTPError(408, MODEL), TRANSPORT),
+            (ModelAPIError(MODEL, "conexão recusada"), TRANSPORT),
+            (asyncio.TimeoutError(), TRANSPORT),
+            (UnexpectedModelBehavior("Exceeded maximum output retries (1)"), VALIDATION),
+            (ModelHTTPError(400, MODEL), FATAL),
+            (ModelHTTPError(403, MODEL), FATAL),
+            (ValueError("bug"), FATAL),
+        ]
+        for error, kind in cases:
+            with self.subTest(error=error):
+                self.assertEqual(classify_error(error), kind)
+
+
+class DelayTest(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(
+            max_attempts=5, base_delay=0.5, max_delay=3, max_retry_after=10, validation_attempts=1
+        )
+
+    def test_retry_after_header(self):
+        error = ModelHTTPError(429, MODEL, headers={"Retry-After": "7"})
+        self.assertEqual(self.policy.delay(1, error), 7)
+
+    def test_google_retry_delay_in_the_body(self):
+        body = {"error": {"code": 429, "details": [
+            {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "4.5s"},
+        ]}}
+        self.assertEqual(self.policy.delay(1, ModelHTTPError(429, MODEL, body=body)), 4.5)
+
+    def test_retry_after_is_capped(self):
+        error = ModelHTTPError(429, MODEL, headers={"Retry-After": "120"})
+        self.assertEqual(self.policy.delay(1, error), 10)
+
+    def test_backoff_ceiling_doubles_up_to_max_delay(self):
+        error = ModelHTTPError(503, MODEL)
+        with mock.patch("app.ai.RetryPolicy.random.uniform", side_effect=lambda low, high: high):
+            ceilings = [self.policy.delay(attempt, error) for attempt in range(1, 6)]
+        self.assertEqual(ceilings, [0.5, 1, 2, 3, 3])
+
+    def test_backoff_has_full_jitter(self):
+        error = ModelHTTPError(503, MODEL)
+        delays = [self.policy.delay(3, error) for _ in range(200)]
+        self.assertTrue(all(0 <= delay <= 2 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+
+class RetryCallTest(unittest.IsolatedAsyncioTestCase):
+    async def _count_calls(self, policy: RetryPolicy, error: BaseException) -> int:
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            raise error
+
+        with self.assertRaises(type(error)):
+            await policy.call(fn, MODEL)
+        return calls
+
+    async def test_transient_errors_retry_up_to_max_attempts(self):
+        policy = _retrying_policy(max_attempts=3)
+        self.assertEqual(await self._count_calls(policy, ModelHTTPError(503, MODEL)), 3)
+        self.assertEqual(policy.retries[TRANSPORT], 2)
+
+    async def test_rate_limit_retries(self):
+        policy = _retrying_policy(max_attempts=2)
+        self.assertEqual(await self._count_calls(policy, ModelHTTPError(429, MODEL)), 2)
+        self.assertEqual(policy.retries[RATE_LIMIT], 1)
+
+    async def test_validation_failures_are_capped_separately(self):
+        policy = _retrying_policy(max_attempts=5, validation_attempts=1)
+        self.assertEqual(await self._count_calls(policy, UnexpectedModelBehavior("saída inválida")), 2)
+
+    async def test_fatal_errors_and_http_exceptions_are_not_retried(self):
+        policy = _retrying_policy()
+        self.assertEqual(await self._count_calls(policy, ModelHTTPError(400, MODEL)), 1)
+        self.assertEqual(await self._count_calls(policy, HTTPException(status_code=503)), 1)
+        self.assertEqual(sum(policy.retries.values()), 0)
+
+    async def test_success_after_a_retry(self):
+        policy = _retrying_policy()
+        fn, started = _calls((0, ModelHTTPError(503, MODEL)), (0, "ok"))
+        self.assertEqual(await policy.call(fn, MODEL), "ok")
+        self.assertEqual(started, [0, 1])
+
+
+class HedgingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_hedge_wins_and_cancels_the_primary(self):
+        policy = _policy()
+        fn, started = _calls((1, "primary"), (0, "hedge"))
+
+        self.assertEqual(await policy.call(fn, MODEL), "hedge")
+        await asyncio.sleep(0)
+        self.assertEqual(started, ["cancelled-0", 1])
+        self.assertEqual((policy.hedges, policy.hedges_won), (1, 1))
+
+    async def test_primary_wins_and_cancels_the_hedge(self):
+        policy = _policy()
+        fn, started = _calls((0.05, "primary"), (1, "hedge"))
+
+        self.assertEqual(await policy.call(fn, MODEL), "primary")
+        await asyncio.sleep(0)
+        self.assertEqual(started, [0, "cancelled-1"])
+        self.assertEqual((policy.hedges, policy.hedges_won), (1, 0))
+
+    async def test_failed_hedge_waits_for_the_primary(self):
+        policy = _policy()
+        fn, _ = _calls((0.05, "primary"), (0, ModelHTTPError(503, MODEL)))
+
+        self.assertEqual(await policy.call(fn, MODEL), "primary")
+        self.assertEqual(policy.hedges_won, 0)
+
+    async def test_both_failing_raises_the_primary_error(self):
+        policy = _policy()
+        primary_error = ModelHTTPError(500, MODEL)
+        fn, _ = _calls((0.05, primary_error), (0, ModelHTTPError(503, MODEL)))
+
+        with self.assertRaises(ModelHTTPError) as raised:
+            await policy.call(fn, MODEL)
+        self.assertIs(raised.exception, primary_error)
+
+    async def test_fast_call_does_not_hedge(self):
+        policy = _policy()
+        fn, started = _calls((0, "primary"), (0, "hedge"))
+
+        self.assertEqual(await policy.call(fn, MODEL), "primary")
+        self.assertEqual(started, [0])
+        self.assertEqual(policy.hedges, 0)
@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+
+from app.ai.Scheduler import ModelScheduler
+
+
+class ModelSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelled_after_hand_off_releases_the_slot(self):
+        scheduler = ModelScheduler(max_concurrency=1, max_queue=4)
+        holder = scheduler.slot()
+        await holder.__aenter__()
+
+        entered = asyncio.Event()
+
+        async def waiter():
+            async with scheduler.slot():
+                entered.set()
+
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.stats()["queued"], 1)
+
+        # A saída repassa a vaga ao waiter sem ceder o event loop; ele é cancelado antes de retomar
+        await holder.__aexit__(None, None, None)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertFalse(entered.is_set())
+        self.assertEqual(scheduler.stats()["active"], 0)
+        self.assertEqual(scheduler.stats()["queued"], 0)
+        async with asyncio.timeout(1):
+            async with scheduler.slot():
+                self.assertEqual(scheduler.stats()["active"], 1)
+
+    async def test_cancelled_while_queued_leaves_the_queue(self):
+        scheduler = ModelScheduler(max_concurrency=1, max_queue=4)
+        async with scheduler.slot():
+            task = asyncio.create_task(scheduler.slot().__aenter__())
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertEqual(scheduler.stats()["queued"], 0)
+        self.assertEqual(scheduler.stats()["active"], 0)
+
+    async def test_higher_priority_is_served_first(self):
+        scheduler = ModelScheduler(max_concurrency=1, max_queue=4)
+        order = []
+
+        async def call(name: str, priority: int):
+            async with scheduler.slot(priority):
+                order.append(name)
+
+        async with scheduler.slot():
+            tasks = [asyncio.create_task(call("low", 0)), asyncio.create_task(call("high", 2))]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["high", "low"])
+
+    async def test_full_queue_rejects_with_503(self):
+        scheduler = ModelScheduler(max_concurrency=1, max_queue=0)
+        async with scheduler.slot():
+            with self.assertRaises(HTTPException) as rejected:
+                async with scheduler.slot():
+                    pass
+        self.assertEqual(rejected.exception.status_code, 503)
+        self.assertIn("Retry-After", rejected.exception.headers)
+        self.assertEqual(scheduler.stats()["rejected"], 1)
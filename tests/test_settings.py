@@ -0,0 +1,18 @@
+import os
+import unittest
+from unittest import mock
+
+from app.config.Settings import _image_format
+
+
+class ImageFormatTest(unittest.TestCase):
+    def test_formats_pillow_can_save(self):
+        with mock.patch.dict(os.environ, {"IMAGE_OUTPUT_FORMAT": "webp"}):
+            self.assertEqual(_image_format("IMAGE_OUTPUT_FORMAT", "JPEG"), "WEBP")
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertEqual(_image_format("IMAGE_OUTPUT_FORMAT", "JPEG"), "JPEG")
+
+    def test_unknown_format_fails_at_load(self):
+        with mock.patch.dict(os.environ, {"IMAGE_OUTPUT_FORMAT": "JPG"}):
+            with self.assertRaisesRegex(ValueError, "IMAGE_OUTPUT_FORMAT=JPG"):
+                _image_format("IMAGE_OUTPUT_FORMAT", "JPEG")
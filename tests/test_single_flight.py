@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+
+from app.cache.SingleFlight import SingleFlight
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_callers_share_one_task(self):
+        single_flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def analysis():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"id": calls}
+
+        first = asyncio.create_task(single_flight.do("key", analysis))
+        second = asyncio.create_task(single_flight.do("key", analysis))
+        await asyncio.sleep(0)
+        self.assertEqual(single_flight.stats()["in_flight"], 1)
+
+        release.set()
+        results = await asyncio.gather(first, second)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(calls, 1)
+        self.assertEqual(single_flight.stats(), {"in_flight": 0, "started": 1, "coalesced": 1})
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        single_flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def analysis():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(single_flight.do("key", analysis))
+        second = asyncio.create_task(single_flight.do("key", analysis))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        release.set()
+        self.assertEqual(await second, "done")
+
+    async def test_error_reaches_every_caller_and_is_forgotten(self):
+        single_flight = SingleFlight()
+
+        async def analysis():
+            await asyncio.sleep(0)
+            raise RuntimeError("provedor")
+
+        results = await asyncio.gather(
+            single_flight.do("key", analysis), single_flight.do("key", analysis), return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(single_flight.stats()["in_flight"], 0)
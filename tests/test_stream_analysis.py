@@ -0,0 +1,90 @@
+import unittest
+from unittest import mock
+
+from fastapi import HTTPException
+from pydantic_ai import BinaryContent
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.models.function import FunctionModel
+
+from app.ai import AiServices
+from app.ai.FakeModel import INVALID_PRODUCT_ID, FakeModelBackend
+from app.ai.RetryPolicy import retry_policy
+from app.ai.Scheduler import model_scheduler
+from app.catalog.ProductCatalog import product_catalog
+from app.config.Settings import SAMPLE_CATALOG_PATH
+from app.models.Request import AIRequest, SkinProfileRequest
+
+
+def _request() -> AIRequest:
+    return AIRequest(
+        skin_profile=SkinProfileRequest(questions=[], others=[]),
+        images=[BinaryContent(data=b"imagem", media_type="image/jpeg")],
+    )
+
+
+class StreamAnalysisTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        product_catalog.load(SAMPLE_CATALOG_PATH)
+        # Toda saída cita um id fora do catálogo
+        backend = FakeModelBackend(0, 0, 0, 503, invalid_output_rate=1.0, seed=1)
+        patcher = mock.patch.object(AiServices, "resolve_model", backend.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_unknown_ids_are_dropped_instead_of_failing_the_stream(self):
+        events = [event async for event in AiServices.stream_analyze_skin(_request())]
+
+        names = [name for name, _ in events]
+        self.assertEqual(names[0], "admitted")
+        self.assertEqual(names[-1], "complete")
+        output = events[-1][1]
+        self.assertNotIn(INVALID_PRODUCT_ID, output.routine.morning + output.routine.night)
+        self.assertEqual(product_catalog.unknown_ids(output.routine.morning + output.routine.night), [])
+
+        products = [value["product"]["title"] for name, value in events if name == "product"]
+        self.assertEqual(len(products), len(output.routine.morning) + len(output.routine.night))
+
+
+class StreamRetryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        product_catalog.load(SAMPLE_CATALOG_PATH)
+        self.calls = 0
+        backend = FakeModelBackend(0, 0, 0, 503, 0, seed=1)
+
+        def model(name: str) -> FunctionModel:
+            stream = backend.model(name).stream_function
+
+            async def flaky_stream(messages, info):
+                self.calls += 1
+                if self.calls == 1:
+                    raise ModelHTTPError(429, name, body={"error": {"details": [{"retryDelay": "0s"}]}})
+                async for chunk in stream(messages, info):
+                    yield chunk
+
+            return FunctionModel(stream_function=flaky_stream, model_name=name)
+
+        for patcher in (
+                mock.patch.object(AiServices, "resolve_model", model),
+                mock.patch.object(retry_policy, "base_delay", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_rate_limit_before_the_first_event_is_retried(self):
+        retries = retry_policy.retries["rate_limit"]
+        events = [event async for event in AiServices.stream_analyze_skin(_request())]
+
+        self.assertEqual(events[0][0], "admitted")
+        self.assertEqual(events[-1][0], "complete")
+        self.assertEqual(retry_policy.retries["rate_limit"], retries + 1)
+        self.assertEqual(model_scheduler.stats()["active"], 0)
+
+    async def test_full_queue_is_rejected_before_admission(self):
+        # Todas as vagas ocupadas e nenhuma posição na fila
+        with mock.patch.object(model_scheduler, "_active", model_scheduler.max_concurrency), \
+                mock.patch.object(model_scheduler, "max_queue", 0):
+            events = AiServices.stream_analyze_skin(_request())
+            with self.assertRaises(HTTPException) as rejected:
+                await anext(events)
+        self.assertEqual(rejected.exception.status_code, 503)
+        self.assertEqual(self.calls, 0)